@@ -1,5 +1,7 @@
 import pandas as pd
+from instrumentation import instrumented
 
+@instrumented("parse.hms")
 def load_data(file_path):
     """
     Loads a CSV file containing hydrograph data and processes it into a structured format.
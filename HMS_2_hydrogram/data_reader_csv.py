@@ -1,5 +1,25 @@
+import numpy as np
 import pandas as pd
+from instrumentation import instrumented
 
+
+def unwrap_day_hours(times):
+    """
+    Turns clock hours that restart at midnight (HEC-HMS exports write the last 24:00
+    sample as 0:00 of the next day) into hours elapsed since the first day.
+
+    Parameters:
+    - times: Sequence of clock times in hours (0-24).
+
+    Returns:
+    - Array of increasing times in hours (24 h are added after every day rollover).
+    """
+    times = np.asarray(times, dtype=float)
+    if len(times) == 0:
+        return times
+    return times + 24 * np.cumsum(np.diff(times, prepend=times[0]) < 0)
+
+@instrumented("parse.csv")
 def load_csv_data(file_path):
     """
     Loads a CSV file containing hydrograph data with columns: Date, Time, Total Flow (M3/S)
@@ -9,7 +29,8 @@ def load_csv_data(file_path):
     - file_path: Path to the input CSV file.
     
     Returns:
-    - df: DataFrame containing columns ["Date", "Time", "Q_outflow", "Time_h"].
+    - df: DataFrame containing columns ["Date", "Time", "Q_outflow", "Time_h"]; Time_h counts
+      the hours from the first day, so it keeps increasing across midnight.
     """
     df = pd.read_csv(file_path, delimiter=",", dtype=str, index_col=False, engine="python")
     
@@ -27,6 +48,6 @@ def load_csv_data(file_path):
     df["Q_outflow"] = df["Q_outflow"].astype(float)
     
     # Convert time to hours (assuming format hh:mm)
-    df["Time_h"] = df["Time"].apply(lambda x: int(x.split(":")[0]) + int(x.split(":")[1]) / 60.0)
+    df["Time_h"] = unwrap_day_hours(df["Time"].apply(lambda x: int(x.split(":")[0]) + int(x.split(":")[1]) / 60.0))
     
     return df
\ No newline at end of file
@@ -1,7 +1,10 @@
-from hecdss import HecDss
 import pandas as pd
+import logging
 import re
 from collections import defaultdict
+from instrumentation import get_logger, instrumented, log_event
+
+logger = get_logger("dss")
 
 # Ruta del archivo de catálogo externo
 CATALOG_FILE_PATH = "./_test/Tr25_NRCS_catalog"
@@ -10,14 +13,16 @@ CATALOG_FILE_PATH = "./_test/Tr25_NRCS_catalog"
 INPUT_FILES = [
     "./_test/TR25.dss"]
 
-def load_catalog_from_file():
+def load_catalog_from_file(catalog_file=None):
     """
     Carga los pathnames desde el archivo de catálogo externo y los organiza en categorías.
     """
+    catalog_file = catalog_file or CATALOG_FILE_PATH
     try:
-        with open(CATALOG_FILE_PATH, "r", encoding="utf-8") as file:
+        with open(catalog_file, "r", encoding="utf-8") as file:
             catalog_paths = [line.strip() for line in file.readlines()]
-        print(f"✅ Catálogo cargado con {len(catalog_paths)} registros.")
+        log_event(logging.INFO, "catalog.loaded", f"Catálogo cargado con {len(catalog_paths)} registros.",
+                  logger, file=catalog_file, rows=len(catalog_paths))
         
         # Organizar pathnames por elemento (Part B) y variable (Part C)
         categorized_paths = defaultdict(lambda: defaultdict(list))
@@ -28,16 +33,16 @@ def load_catalog_from_file():
         
         return categorized_paths
     except Exception as e:
-        print(f"❌ Error al cargar el catálogo: {e}")
+        log_event(logging.ERROR, "catalog.error", f"Error al cargar el catálogo: {e}", logger, file=catalog_file)
         return {}
 
-def select_pathname():
+def select_pathname(catalog_file=None):
     """
     Permite al usuario seleccionar un pathname desde el catálogo externo organizado por elementos y variables.
     """
-    categorized_paths = load_catalog_from_file()
+    categorized_paths = load_catalog_from_file(catalog_file)
     if not categorized_paths:
-        print("❌ No se encontraron pathnames en el catálogo.")
+        log_event(logging.ERROR, "catalog.empty", "No se encontraron pathnames en el catálogo.", logger)
         return None
     
     # Mostrar los elementos disponibles (Part B) con opciones numeradas
@@ -93,48 +98,59 @@ def select_pathname():
         except ValueError:
             print("❌ Entrada inválida. Ingrese un número válido.")
 
-def load_dss_data(file_paths):
+@instrumented("parse.dss")
+def load_dss_data(file_paths, pathname=None, catalog_file=None):
     """
     Reads time-series data from multiple DSS files using HecDss, allowing the user to select the dataset.
 
     Parameters:
     - file_paths (list of str): List of paths to DSS files.
+    - pathname (str): DSS pathname to read from every file; if None the user selects it from the catalog.
+    - catalog_file (str): Catalog used for the interactive selection (defaults to CATALOG_FILE_PATH).
 
     Returns:
     - df (pd.DataFrame): DataFrame containing time and flow data from all files.
     """
+    from hecdss import HecDss
+
     data_list = []
+    selected_pathname = pathname
     
     for file_path in file_paths:
-        print(f"\n📂 Procesando archivo DSS: {file_path}")
-        pathname = select_pathname()
+        log_event(logging.INFO, "dss.file", f"Procesando archivo DSS: {file_path}", logger, file=file_path)
+        pathname = selected_pathname or select_pathname(catalog_file)
         if not pathname:
-            print(f"⚠ Saltando archivo {file_path} debido a errores en la selección del pathname.")
+            log_event(logging.WARNING, "dss.skipped", f"Saltando archivo {file_path} debido a errores en la selección del pathname.",
+                      logger, file=file_path)
             continue
         
         # Abrir el archivo DSS y leer los datos
         with HecDss(file_path) as dss:
             try:
-                print("📥 Leyendo datos del DSS...")
+                log_event(logging.DEBUG, "dss.read", "Leyendo datos del DSS...", logger, file=file_path, pathname=pathname)
                 data = dss.get(pathname)
-                print("✅ Datos obtenidos correctamente.")
+                log_event(logging.DEBUG, "dss.read.done", "Datos obtenidos correctamente.", logger, file=file_path)
                 
                 if not hasattr(data, "times") or not hasattr(data, "values"):
-                    print(f"⚠ Advertencia: No se pudieron extraer datos válidos de {file_path} en {pathname}")
+                    log_event(logging.WARNING, "dss.invalid", f"No se pudieron extraer datos válidos de {file_path} en {pathname}",
+                              logger, file=file_path, pathname=pathname)
                     continue
             except Exception as e:
-                print(f"❌ Error al leer datos de {file_path} en {pathname}: {e}")
+                log_event(logging.ERROR, "dss.error", f"Error al leer datos de {file_path} en {pathname}: {e}",
+                          logger, file=file_path, pathname=pathname)
                 continue
         
         # Manejar TS-PATTERN y rangos de fechas para evitar errores
         part_D = pathname.split("/")[3]
         if "TS-PATTERN" in part_D or "-" in part_D:
-            print(f"⚠ Advertencia: El pathname '{pathname}' usa un rango de fechas o TS-PATTERN. Se omitirá la conversión de fecha.")
+            log_event(logging.WARNING, "dss.no_dates",
+                      f"El pathname '{pathname}' usa un rango de fechas o TS-PATTERN. Se omitirá la conversión de fecha.",
+                      logger, pathname=pathname)
             df_time = pd.Series(range(len(data.values)))  # Crear índice numérico
         else:
             df_time = pd.to_datetime(data.times, errors='coerce')
         
-        print("🛠 Construyendo DataFrame...")
+        log_event(logging.DEBUG, "dss.dataframe", "Construyendo DataFrame...", logger, file=file_path)
         df = pd.DataFrame({
             "Time": df_time,  
             "Q_outflow": data.values,  
@@ -146,7 +162,8 @@ def load_dss_data(file_paths):
             df = df.dropna(subset=["Time"])
         
         if df.empty:
-            print(f"⚠ Advertencia: No hay datos válidos en {file_path} ({pathname}).")
+            log_event(logging.WARNING, "dss.empty", f"No hay datos válidos en {file_path} ({pathname}).",
+                      logger, file=file_path, pathname=pathname)
             continue
         
         if "TS-PATTERN" not in part_D and "-" not in part_D:
@@ -154,10 +171,11 @@ def load_dss_data(file_paths):
         else:
             df["Time_h"] = df.index.astype(float)
         
-        print(f"✅ DataFrame creado con {len(df)} filas.")
+        log_event(logging.INFO, "dss.loaded", f"DataFrame creado con {len(df)} filas.", logger,
+                  file=file_path, pathname=pathname, rows=len(df))
         data_list.append(df)
     
     if not data_list:
-        raise ValueError("❌ No se pudieron extraer datos válidos de ningún archivo DSS.")
+        raise ValueError("No se pudieron extraer datos válidos de ningún archivo DSS.")
     
     return pd.concat(data_list, ignore_index=True)
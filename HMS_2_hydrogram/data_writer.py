@@ -1,48 +1,74 @@
+from instrumentation import instrumented
+
+
+def format_tikz_plot(index, data, time, marker_density=1.0):
+    """
+    Returns the \\addplot block of one hydrograph (the index selects its marker).
+    """
+    markers = ["triangle*", "square*", "circle*", "diamond*"]
+    mark_repeat = max(1, round(1 / marker_density))  # Ensure a valid mark repeat value
+    lines = [f"        \\addplot[black, thick, mark={markers[index % len(markers)]}, mark repeat={mark_repeat}] coordinates {{\n"]
+    lines.extend(f"            ({t:.2f}, {q:.2f})\n" for t, q in zip(time, data)
+                 if t is not None and q is not None and q >= 0)  # Ensure valid non-negative values
+    lines.append("        };")
+    return "".join(lines)
+
+
+def format_tikz_header(times, time_min=None, time_max=None, max_flows=None):
+    """
+    Returns the opening of the wrapped figure (figure, tikzpicture and axis with its limits).
+    """
+    return ("\\begin{figure}[H]\n"
+            "    \\centering\n"
+            "    \\begin{tikzpicture}\n"
+            "        \\begin{axis}["
+            "width=14cm, height=8cm, "
+            f"xmin={time_min if time_min is not None else min(min(t) for t in times):.2f}, xmax={time_max if time_max is not None else max(max(t) for t in times):.2f}, "
+            "ymin=0, "
+            f"ymax={max(max_flows) * 1.3 if max_flows is not None else 10:.2f}, "
+            "xlabel={Time (h)}, ylabel={Flow rate (m³/s)}, "
+            "grid=major, legend pos=north east, title={Hydrograph Output - Multiple Datasets}, smooth]\n")
+
+
+def format_tikz_footer(labels, wrap=False, label_max_point=False, max_times=None, max_flows=None):
+    """
+    Returns everything after the \\addplot blocks: legend, max flow labels and (wrap) the closing of the figure.
+    """
+    lines = []
+    legend_entries = [label.replace("_", "\\_") for label in labels]  # Store legend safely
+    
+    # Add combined legend
+    if legend_entries:
+        lines.append(f"        \\legend{{{', '.join(legend_entries)}}}\n")
+    
+    # Highlight max flow points
+    if label_max_point and max_times is not None and max_flows is not None:
+        for i, (max_time, max_flow) in enumerate(zip(max_times, max_flows)):
+            if max_time is not None and max_flow is not None:
+                lines.append(f"        \\node[above=8pt, draw=blue, fill=white, rounded corners] at (axis cs:{max_time:.2f},{max_flow:.2f}) {{Max: {max_flow:.2f} m³/s}};\n")
+                lines.append(f"        \\addplot[only marks, mark=*, mark options={{color=blue, scale=1.5}}] coordinates {{({max_time:.2f},{max_flow:.2f})}};\n")
+    
+    if wrap:
+        lines.append("        \\end{axis}\n"
+                     "    \\end{tikzpicture}\n"
+                     "    \\caption{Hydrograph Output - Multiple Datasets}\n"
+                     "    \\label{fig:hydrograph}\n"
+                     "\\end{figure}\n")
+    return "".join(lines)
+
+
+@instrumented("output.tikz", rows=None)
 def write_tikz(file_path, datasets, labels, times, wrap=False, table_name="datatable", time_min=None, time_max=None, marker_density=1.0, label_max_point=False, max_times=None, max_flows=None):
     """
     Writes multiple hydrographs to TikZ format with structured hydrograph data.
     """
     with open(file_path, 'w', encoding='utf-8') as f:
         if wrap:
-            f.write("\\begin{figure}[H]\n")
-            f.write("    \\centering\n")
-            f.write("    \\begin{tikzpicture}\n")
-            f.write("        \\begin{axis}[")
-            f.write("width=14cm, height=8cm, ")
-            f.write(f"xmin={time_min if time_min is not None else min(min(t) for t in times):.2f}, xmax={time_max if time_max is not None else max(max(t) for t in times):.2f}, ")
-            f.write("ymin=0, ")
-            f.write(f"ymax={max(max_flows) * 1.3 if max_flows is not None else 10:.2f}, ")
-            f.write("xlabel={Time (h)}, ylabel={Flow rate (m³/s)}, ")
-            f.write("grid=major, legend pos=north east, title={Hydrograph Output - Multiple Datasets}, smooth]\n")
-        
-        markers = ["triangle*", "square*", "circle*", "diamond*"]
-        legend_entries = []  # Store legend entries
+            f.write(format_tikz_header(times, time_min, time_max, max_flows))
         
-        for i, (data, label, time) in enumerate(zip(datasets, labels, times)):
-            mark_repeat = max(1, round(1 / marker_density))  # Ensure a valid mark repeat value
-            f.write(f"        \\addplot[black, thick, mark={markers[i % len(markers)]}, mark repeat={mark_repeat}] coordinates {{\n")
-            for t, q in zip(time, data):
-                if t is not None and q is not None and q >= 0:  # Ensure valid non-negative values
-                    f.write(f"            ({t:.2f}, {q:.2f})\n")
-            f.write("        };")
-            legend_entries.append(label.replace("_", "\\_"))  # Store legend safely
+        for i, (data, time) in enumerate(zip(datasets, times)):
+            f.write(format_tikz_plot(i, data, time, marker_density))
         
-        # Add combined legend
-        if legend_entries:
-            f.write(f"        \\legend{{{', '.join(legend_entries)}}}\n")
-        
-        # Highlight max flow points
-        if label_max_point and max_times is not None and max_flows is not None:
-            for i, (max_time, max_flow) in enumerate(zip(max_times, max_flows)):
-                if max_time is not None and max_flow is not None:
-                    f.write(f"        \\node[above=8pt, draw=blue, fill=white, rounded corners] at (axis cs:{max_time:.2f},{max_flow:.2f}) {{Max: {max_flow:.2f} m³/s}};\n")
-                    f.write(f"        \\addplot[only marks, mark=*, mark options={{color=blue, scale=1.5}}] coordinates {{({max_time:.2f},{max_flow:.2f})}};\n")
-        
-        if wrap:
-            f.write("        \\end{axis}\n")
-            f.write("    \\end{tikzpicture}\n")
-            f.write("    \\caption{Hydrograph Output - Multiple Datasets}\n")
-            f.write("    \\label{fig:hydrograph}\n")
-            f.write("\\end{figure}\n")
+        f.write(format_tikz_footer(labels[:len(datasets)], wrap, label_max_point, max_times, max_flows))
     
     print(f"TikZ file generated: {file_path}")
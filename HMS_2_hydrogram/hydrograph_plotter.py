@@ -1,6 +1,8 @@
 import matplotlib.pyplot as plt
 import pandas as pd
+from instrumentation import instrumented
 
+@instrumented("output.plot", rows=None)
 def plot_hydrographs(datasets, labels, times, time_min=None, time_max=None, marker_density=1.0, label_max_point=False, max_times=None, max_flows=None):
     """
     Generates a plot with Matplotlib to visualize multiple hydrographs with optional time filtering and marker density control.
@@ -0,0 +1,214 @@
+"""
+Hydrograph statistics computed in one vectorized pass over many series.
+
+The series are stacked in a 2-D (series x time) array (ragged series are padded with
+NaN), and every statistic is accumulated from the trapezoidal intervals of all series
+at once. The same accumulators accept the data in consecutive time chunks
+(`StreamingStatistics.update`), so long DSS/CSV runs can be summarized while they
+are read without keeping them in memory.
+
+Statistics (times in hours, flows in m³/s):
+- peak_flow, time_to_peak: maximum flow and its time.
+- volume_m3: runoff volume (trapezoidal rule).
+- time_above_threshold: total time with flow above `threshold`.
+- centroid_time: time of the centroid of the hydrograph.
+- centroid_lag: centroid_time minus the rainfall centroid when given, otherwise minus
+  the start of runoff.
+- rising_duration, falling_duration: from the start of runoff (first flow above
+  `base_flow`) to the peak, and from the peak to the end of runoff.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+STATISTICS = ["peak_flow", "time_to_peak", "volume_m3", "time_above_threshold", "centroid_time",
+              "centroid_lag", "rising_duration", "falling_duration", "n_samples"]
+
+
+def stack_series(times_list, flows_list):
+    """
+    Stacks ragged series into two (series x time) arrays padded with NaN.
+
+    Parameters:
+    - times_list: List of sequences of times.
+    - flows_list: List of sequences of flows (same lengths as times_list).
+
+    Returns:
+    - (times, flows) 2-D arrays.
+    """
+    length = max((len(t) for t in times_list), default=0)
+    times = np.full((len(times_list), length), np.nan)
+    flows = np.full((len(flows_list), length), np.nan)
+    for i, (t, q) in enumerate(zip(times_list, flows_list)):
+        times[i, :len(t)] = t
+        flows[i, :len(q)] = q
+    return times, flows
+
+
+class StreamingStatistics:
+    """
+    Accumulates the statistics of `n_series` hydrographs fed in time chunks.
+
+    Example:
+        stats = StreamingStatistics(len(labels))
+        for times_chunk, flows_chunk in chunks:   # arrays of shape (n_series, chunk_length)
+            stats.update(times_chunk, flows_chunk)
+        table = stats.to_frame(labels)
+    """
+
+    def __init__(self, n_series, threshold=0.0, base_flow=0.0):
+        self.threshold = threshold
+        self.base_flow = base_flow
+        self.peak_flow = np.full(n_series, -np.inf)
+        self.time_to_peak = np.full(n_series, np.nan)
+        self.volume = np.zeros(n_series)  # m³/s * h
+        self.moment = np.zeros(n_series)  # m³/s * h²
+        self.time_above = np.zeros(n_series)
+        self.first_runoff = np.full(n_series, np.nan)
+        self.last_runoff = np.full(n_series, np.nan)
+        self.n_samples = np.zeros(n_series, dtype=int)
+        self._last_time = np.full(n_series, np.nan)
+        self._last_flow = np.full(n_series, np.nan)
+
+    def update(self, times, flows):
+        """
+        Adds the next chunk of samples.
+
+        Parameters:
+        - times: Array (n_series, k) of elapsed times, increasing along every series (clock
+          times that restart at midnight must be unwrapped first, see unwrap_day_hours);
+          NaN marks missing samples.
+        - flows: Array (n_series, k) of flows.
+        """
+        times = np.atleast_2d(np.asarray(times, dtype=float))
+        flows = np.atleast_2d(np.asarray(flows, dtype=float))
+        valid = ~(np.isnan(times) | np.isnan(flows))
+        rows = np.arange(len(flows))
+        self.n_samples += valid.sum(axis=1)
+
+        # Peak
+        masked = np.where(valid, flows, -np.inf)
+        idx = np.argmax(masked, axis=1)
+        chunk_peak = masked[rows, idx]
+        new_peak = chunk_peak > self.peak_flow
+        self.peak_flow = np.where(new_peak, chunk_peak, self.peak_flow)
+        self.time_to_peak = np.where(new_peak, times[rows, idx], self.time_to_peak)
+
+        # Start and end of runoff
+        runoff = valid & (flows > self.base_flow)
+        has_runoff = runoff.any(axis=1)
+        first = times[rows, np.argmax(runoff, axis=1)]
+        last = times[rows, runoff.shape[1] - 1 - np.argmax(runoff[:, ::-1], axis=1)]
+        self.first_runoff = np.where(np.isnan(self.first_runoff) & has_runoff, first, self.first_runoff)
+        self.last_runoff = np.where(has_runoff, last, self.last_runoff)
+
+        # Trapezoidal intervals, including the one joining the previous chunk
+        t = np.concatenate([self._last_time[:, np.newaxis], times], axis=1)
+        q = np.concatenate([self._last_flow[:, np.newaxis], flows], axis=1)
+        dt = np.diff(t, axis=1)
+        q_mid = (q[:, 1:] + q[:, :-1]) / 2
+        t_mid = (t[:, 1:] + t[:, :-1]) / 2
+        ok = ~np.isnan(dt) & ~np.isnan(q_mid)
+        dt, q_mid, t_mid = np.where(ok, dt, 0), np.where(ok, q_mid, 0), np.where(ok, t_mid, 0)
+        self.volume += np.sum(q_mid * dt, axis=1)
+        self.moment += np.sum(q_mid * t_mid * dt, axis=1)
+        self.time_above += np.sum(np.where(q_mid > self.threshold, dt, 0), axis=1)
+
+        # Keep the last valid sample of every series for the next chunk
+        has_valid = valid.any(axis=1)
+        last_valid = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        self._last_time = np.where(has_valid, times[rows, last_valid], self._last_time)
+        self._last_flow = np.where(has_valid, flows[rows, last_valid], self._last_flow)
+        return self
+
+    def to_frame(self, labels=None, rain_centroid=None):
+        """
+        Returns the statistics as a tidy DataFrame (one row per series).
+
+        Parameters:
+        - labels: Series labels (defaults to 0..n-1).
+        - rain_centroid: Optional array with the centroid time of the rainfall of every series.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            centroid = self.moment / self.volume
+        reference = self.first_runoff if rain_centroid is None else np.asarray(rain_centroid, dtype=float)
+        peak_flow = np.where(np.isfinite(self.peak_flow), self.peak_flow, np.nan)
+        table = pd.DataFrame({
+            "label": labels if labels is not None else np.arange(len(self.volume)),
+            "peak_flow": peak_flow,
+            "time_to_peak": self.time_to_peak,
+            "volume_m3": self.volume * 3600,
+            "time_above_threshold": self.time_above,
+            "centroid_time": centroid,
+            "centroid_lag": centroid - reference,
+            "rising_duration": self.time_to_peak - self.first_runoff,
+            "falling_duration": self.last_runoff - self.time_to_peak,
+            "n_samples": self.n_samples,
+        })
+        return table
+
+
+def compute_statistics(times, flows, labels=None, threshold=0.0, base_flow=0.0, rain_centroid=None):
+    """
+    Statistics of many hydrographs in one vectorized pass.
+
+    Parameters:
+    - times: Array (series x time), or list of sequences (ragged series are NaN-padded);
+      elapsed hours, increasing along every series.
+    - flows: Array (series x time), list of sequences, or one 1-D series.
+    - labels: Series labels.
+    - threshold: Flow used for time_above_threshold (m³/s).
+    - base_flow: Flow above which there is runoff (start/end of the hydrograph).
+    - rain_centroid: Optional rainfall centroid time of every series (for centroid_lag).
+
+    Returns:
+    - DataFrame with one row per series and the columns "label" + STATISTICS.
+    """
+    if len(flows) and np.ndim(flows[0]) == 0:
+        # A single series
+        times, flows = np.atleast_2d(np.asarray(times, dtype=float)), np.atleast_2d(np.asarray(flows, dtype=float))
+    elif not isinstance(flows, np.ndarray) or flows.ndim != 2:
+        times, flows = stack_series(list(times), list(flows))
+    times = np.broadcast_to(np.asarray(times, dtype=float), flows.shape)  # Allows one shared time axis
+    stats = StreamingStatistics(len(flows), threshold, base_flow)
+    return stats.update(times, flows).to_frame(labels, rain_centroid)
+
+
+def summarize_files(file_paths, loader, threshold=0.0, base_flow=0.0):
+    """
+    Statistics table of the outflow hydrograph of several files.
+
+    Parameters:
+    - file_paths: List of paths.
+    - loader: Reader returning a DataFrame with "Time_h" and "Q_outflow" (e.g. load_csv_data).
+
+    Returns:
+    - DataFrame with one row per file (label = file name without extension).
+    """
+    frames = [loader(path) for path in file_paths]
+    labels = [os.path.splitext(os.path.basename(path))[0] for path in file_paths]
+    return compute_statistics([df["Time_h"].to_numpy(dtype=float) for df in frames],
+                              [df["Q_outflow"].to_numpy(dtype=float) for df in frames],
+                              labels, threshold, base_flow)
+
+
+def summarize_frame(df, by=("Source_File", "Pathname"), threshold=0.0, base_flow=0.0):
+    """
+    Statistics table of a long-format DataFrame holding many series, such as the output
+    of load_dss_data (one block of rows per DSS file and pathname).
+
+    Parameters:
+    - df: DataFrame with "Time_h", "Q_outflow" and the columns in `by`.
+    - by: Columns identifying every series.
+
+    Returns:
+    - DataFrame with one row per series; the `by` columns replace "label".
+    """
+    by = list(by)
+    groups = list(df.groupby(by, sort=False))
+    table = compute_statistics([g["Time_h"].to_numpy(dtype=float) for _, g in groups],
+                               [g["Q_outflow"].to_numpy(dtype=float) for _, g in groups],
+                               threshold=threshold, base_flow=base_flow)
+    keys = pd.DataFrame([key if isinstance(key, tuple) else (key,) for key, _ in groups], columns=by)
+    return pd.concat([keys, table.drop(columns="label")], axis=1)
+
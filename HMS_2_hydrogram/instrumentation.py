@@ -0,0 +1,296 @@
+"""
+Opt-in instrumentation for the hydrograph pipeline.
+
+Stages are wrapped in named spans (`span` / `instrumented`) that record wall time,
+CPU time, peak allocated memory and row counts. Spans are no-ops until the layer
+is enabled, either with `enable()` or by setting the environment variable
+HYDRO_TRACE=1 (HYDRO_TRACE=nomem skips the memory tracking, which is the costly part).
+
+Memory figures come from tracemalloc, whose counters are process-wide: they are only
+recorded for spans opened in the main thread, and are only meaningful while no other
+thread allocates (i.e. in the sequential mode of the pipeline). Spans of worker threads
+report `peak_bytes` None.
+
+Progress messages go through the `logging` module as structured events
+(`log_event`). Importing this module does not touch the logging configuration; the
+entry points call `configure_logging(level)` (default: HYDRO_LOG_LEVEL or INFO).
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+LOGGER_NAME = "hydrograph"
+
+_state = {"enabled": False, "memory": False}
+_records = []
+_records_lock = threading.Lock()
+_local = threading.local()
+
+
+class Span:
+    """
+    Measurements of one pipeline stage. Set `rows` (and any extra attribute in `attrs`)
+    inside the `with span(...)` block to record the amount of data processed.
+    """
+    __slots__ = ("name", "path", "attrs", "rows", "wall_s", "cpu_s", "peak_bytes",
+                 "_wall0", "_cpu0", "_mem0", "_child_peak")
+
+    def __init__(self, name, path, attrs):
+        self.name = name
+        self.path = path
+        self.attrs = attrs
+        self.rows = None
+        self.wall_s = None
+        self.cpu_s = None
+        self.peak_bytes = None
+        self._child_peak = 0
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "path": ";".join(self.path),
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "peak_bytes": self.peak_bytes,
+            "rows": self.rows,
+            "attrs": self.attrs,
+        }
+
+
+class _NullSpan:
+    """Span returned while instrumentation is disabled; attribute writes are discarded."""
+    __slots__ = ()
+
+    def __setattr__(self, key, value):
+        pass
+
+    @property
+    def attrs(self):
+        return {}
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable(memory=True):
+    """
+    Enables span recording.
+    :param memory: Also track peak allocated memory with tracemalloc.
+    """
+    _state["enabled"] = True
+    _state["memory"] = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """Disables span recording (already recorded spans are kept)."""
+    _state["enabled"] = False
+    if _state["memory"] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state["memory"] = False
+
+
+def is_enabled():
+    return _state["enabled"]
+
+
+def reset():
+    """Discards every recorded span."""
+    with _records_lock:
+        _records.clear()
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def span(name, /, **attrs):
+    """
+    Records one pipeline stage. Any attribute name is allowed (including "name" and "rows").
+
+    Example:
+        with span("parse.csv", file=path) as s:
+            df = load(path)
+            s.rows = len(df)
+    """
+    if not _state["enabled"]:
+        yield _NULL_SPAN
+        return
+
+    stack = _stack()
+    path = (stack[-1].path if stack else ()) + (name,)
+    current = Span(name, path, attrs)
+
+    # tracemalloc peaks are process-wide: concurrent spans would reset each other's counter
+    track_memory = (_state["memory"] and tracemalloc.is_tracing()
+                    and threading.current_thread() is threading.main_thread())
+    if track_memory:
+        mem_now, mem_peak = tracemalloc.get_traced_memory()
+        if stack:
+            # Keep the parent's peak so far before resetting the counter for this span
+            stack[-1]._child_peak = max(stack[-1]._child_peak, mem_peak)
+        tracemalloc.reset_peak()
+        current._mem0 = mem_now
+
+    stack.append(current)
+    current._cpu0 = time.process_time()
+    current._wall0 = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.wall_s = time.perf_counter() - current._wall0
+        current.cpu_s = time.process_time() - current._cpu0
+        stack.pop()
+        if track_memory:
+            _, mem_peak = tracemalloc.get_traced_memory()
+            mem_peak = max(mem_peak, current._child_peak)
+            current.peak_bytes = max(0, mem_peak - current._mem0)
+            if stack:
+                stack[-1]._child_peak = max(stack[-1]._child_peak, mem_peak)
+        with _records_lock:
+            _records.append(current)
+        _emit(logging.DEBUG, "span.end", f"{';'.join(path)} {current.wall_s * 1e3:.2f} ms", None,
+              {**attrs, "rows": current.rows})
+
+
+def instrumented(name, rows=len):
+    """
+    Decorator that wraps every call of a function in `span(name)`.
+    :param name: Span name (e.g. "parse.csv").
+    :param rows: Function applied to the result to obtain the row count (None to skip).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return func(*args, **kwargs)
+            with span(name, function=func.__qualname__) as s:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    try:
+                        s.rows = rows(result)
+                    except TypeError:
+                        pass
+                return result
+        return wrapper
+    return decorator
+
+
+def records():
+    """Returns the recorded spans as a list of dicts, in completion order."""
+    with _records_lock:
+        return [s.as_dict() for s in _records]
+
+
+def summary():
+    """
+    Builds the per-run summary.
+
+    Returns:
+    - dict with "spans" (every recorded span) and "stages" (totals per span path:
+      calls, wall_s, cpu_s, self_wall_s, peak_bytes, rows).
+    """
+    spans = records()
+    stages = {}
+    for s in spans:
+        stage = stages.setdefault(s["path"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "self_wall_s": 0.0,
+                                              "peak_bytes": None, "rows": None})
+        stage["calls"] += 1
+        stage["wall_s"] += s["wall_s"]
+        stage["cpu_s"] += s["cpu_s"]
+        stage["self_wall_s"] += s["wall_s"]
+        if s["peak_bytes"] is not None:
+            stage["peak_bytes"] = max(stage["peak_bytes"] or 0, s["peak_bytes"])
+        if s["rows"] is not None:
+            stage["rows"] = (stage["rows"] or 0) + s["rows"]
+    # Self time = time not spent in child spans
+    for path, stage in stages.items():
+        parent = path.rsplit(";", 1)[0] if ";" in path else None
+        if parent in stages:
+            stages[parent]["self_wall_s"] -= stage["wall_s"]
+    return {"spans": spans, "stages": stages}
+
+
+def write_summary(file_path):
+    """Writes `summary()` as JSON."""
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(summary(), f, indent=2, default=str)
+    log_event(logging.INFO, "trace.written", f"Resumen de instrumentación guardado en {file_path}", file=file_path)
+
+
+def write_collapsed(file_path):
+    """
+    Writes the span tree in collapsed-stack format ("stage;substage <microseconds>" per line),
+    the input format of flamegraph.pl / speedscope, using the self time of every stage.
+    """
+    with open(file_path, "w", encoding="utf-8") as f:
+        for path, stage in summary()["stages"].items():
+            f.write(f"{path} {max(0, round(stage['self_wall_s'] * 1e6))}\n")
+
+
+# ==========================
+# STRUCTURED EVENTS
+# ==========================
+class EventFormatter(logging.Formatter):
+    """Formats records as `LEVEL event message key=value ...`."""
+
+    def format(self, record):
+        event = getattr(record, "event", record.name)
+        fields = getattr(record, "fields", {}) or {}
+        extra = " ".join(f"{k}={v}" for k, v in fields.items() if v is not None)
+        return f"{record.levelname:<7} {event:<18} {record.getMessage()}" + (f" [{extra}]" if extra else "")
+
+
+def configure_logging(level=None):
+    """
+    Sets the verbosity of the pipeline events.
+    :param level: Logging level name or number; defaults to HYDRO_LOG_LEVEL or INFO.
+    """
+    level = level or os.environ.get("HYDRO_LOG_LEVEL", "INFO")
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    logger = logging.getLogger(LOGGER_NAME)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(EventFormatter())
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+def get_logger(name):
+    """Returns the logger of one pipeline module (child of the "hydrograph" logger)."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def log_event(level, event, message, logger=None, **fields):
+    """
+    Emits a structured event.
+    :param level: Logging level (e.g. logging.INFO).
+    :param event: Machine-readable event name (e.g. "dss.read").
+    :param message: Human-readable message.
+    :param fields: Extra key/value data attached to the event.
+    """
+    _emit(level, event, message, logger, fields)
+
+
+def _emit(level, event, message, logger, fields):
+    """log_event with the fields as one dict (their names may clash with the other arguments)."""
+    logger = logger or logging.getLogger(LOGGER_NAME)
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"event": event, "fields": fields})
+
+
+if os.environ.get("HYDRO_TRACE", "") not in ("", "0"):
+    enable(memory=os.environ["HYDRO_TRACE"].lower() != "nomem")
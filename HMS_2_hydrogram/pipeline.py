@@ -0,0 +1,207 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from data_writer import format_tikz_footer, format_tikz_header, format_tikz_plot, write_tikz
+from hydrograph_stats import compute_statistics
+import instrumentation
+
+
+def reduce_series(times, flows, time_min=None, time_max=None, num_points=None):
+    """
+    Filters a hydrograph to [time_min, time_max], resamples it and locates its peak.
+
+    Parameters:
+    - times: Sequence of times (h).
+    - flows: Sequence of flow rates (m³/s).
+    - time_min, time_max: Time window (None for no limit).
+    - num_points: Maximum number of points kept (None to keep all).
+
+    Returns:
+    - (times, flows, max_time, max_flow) with times and flows as lists.
+    """
+    times = np.asarray(times, dtype=float)
+    flows = np.asarray(flows, dtype=float)
+
+    # Apply time filtering before resampling
+    mask = np.ones(len(times), dtype=bool)
+    if time_min is not None:
+        mask &= times >= time_min
+    if time_max is not None:
+        mask &= times <= time_max
+    times, flows = times[mask], flows[mask]
+
+    # Resample data to reduce number of points
+    if num_points is not None and len(times) > num_points:
+        indices = np.linspace(0, len(times) - 1, num_points, dtype=int)
+        times, flows = times[indices], flows[indices]
+
+    if len(flows) == 0:
+        return [], [], None, None
+    max_idx = int(np.argmax(flows))
+    return times.tolist(), flows.tolist(), float(times[max_idx]), float(flows[max_idx])
+
+
+def load_reduced(file, loader, time_min=None, time_max=None, num_points=None, stats_threshold=0.0):
+    """
+    Reads one file, reduces its outflow hydrograph (see reduce_series) and computes the
+    statistics of the full-resolution hydrograph, so that only the reduced data are kept
+    (and, in worker processes, sent back).
+
+    Returns:
+    - dict with "label", "times", "flows", "max_time", "max_flow" and "statistics" (one-row
+      DataFrame, see hydrograph_stats.compute_statistics).
+    """
+    df = loader(file)
+    label = os.path.splitext(os.path.basename(file))[0]
+    with instrumentation.span("reduce", file=file) as s:
+        times, flows, max_time, max_flow = reduce_series(df["Time_h"], df["Q_outflow"], time_min, time_max, num_points)
+        s.rows = len(flows)
+    with instrumentation.span("statistics", file=file) as s:
+        statistics = compute_statistics(df["Time_h"].to_numpy(dtype=float), df["Q_outflow"].to_numpy(dtype=float),
+                                        [label], threshold=stats_threshold)
+        s.rows = len(statistics)
+    return {"label": label, "times": times, "flows": flows, "max_time": max_time, "max_flow": max_flow,
+            "statistics": statistics}
+
+
+def load_pipelined(input_files, loader, body, time_min=None, time_max=None, num_points=None, marker_density=0.30,
+                   workers=4, processes=True, stats_threshold=0.0):
+    """
+    Parses and reduces the input files concurrently and writes the TikZ \\addplot block of each
+    file to `body` as soon as that file and every file before it are reduced, so the output is
+    written while the remaining files are still being parsed. Files that finish out of order
+    wait in a reorder buffer until their predecessors are written.
+
+    Parameters:
+    - input_files: List of existing paths.
+    - loader, time_min, time_max, num_points, stats_threshold: See load_reduced.
+    - body: Open text file receiving the \\addplot blocks in input order.
+    - marker_density: See write_tikz.
+    - workers: Number of parsing workers.
+    - processes: Parse in worker processes (the spans of the workers are then not recorded).
+      Both load_data and load_csv_data hold the GIL while parsing (python CSV engine and
+      per-row conversions), so with processes=False the worker threads parse one file at a
+      time and only the file reads and the TikZ output overlap.
+
+    Returns:
+    - load_reduced dicts in input order.
+    """
+    reduced = [None] * len(input_files)
+    written = 0
+    pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with pool_class(max_workers=workers) as pool:
+        futures = {pool.submit(load_reduced, file, loader, time_min, time_max, num_points, stats_threshold): i
+                   for i, file in enumerate(input_files)}
+        for future in as_completed(futures):
+            reduced[futures[future]] = future.result()
+            while written < len(reduced) and reduced[written] is not None:
+                with instrumentation.span("output.tikz.plot", file=input_files[written]):
+                    body.write(format_tikz_plot(written, reduced[written]["flows"], reduced[written]["times"],
+                                                marker_density))
+                written += 1
+    return reduced
+
+
+def write_pipelined(input_files, loader, output_file, time_min=None, time_max=None, num_points=None,
+                    marker_density=0.30, label_max_point=True, wrap=True, workers=4, processes=True,
+                    stats_threshold=0.0):
+    """
+    Pipelined load_reduced + write_tikz: the \\addplot blocks are streamed to disk by
+    load_pipelined while the inputs are parsed. The axis limits of the wrapped figure depend on
+    every file, so with `wrap` the blocks are streamed to `output_file` + ".part" and the header is
+    put in front of them once all files are read; the output is identical to write_tikz.
+
+    Returns:
+    - load_reduced dicts in input order.
+    """
+    body_file = output_file + ".part" if wrap else output_file
+    try:
+        with open(body_file, "w", encoding="utf-8") as body:
+            reduced = load_pipelined(input_files, loader, body, time_min, time_max, num_points, marker_density,
+                                     workers=workers, processes=processes, stats_threshold=stats_threshold)
+            if not wrap:
+                body.write(format_tikz_footer([r["label"] for r in reduced], wrap, label_max_point,
+                                              [r["max_time"] for r in reduced], [r["max_flow"] for r in reduced]))
+        if wrap:
+            with instrumentation.span("output.tikz"):
+                with open(output_file, "w", encoding="utf-8") as f, open(body_file, "r", encoding="utf-8") as body:
+                    f.write(format_tikz_header([r["times"] for r in reduced], time_min, time_max,
+                                               [r["max_flow"] for r in reduced]))
+                    shutil.copyfileobj(body, f)
+                    f.write(format_tikz_footer([r["label"] for r in reduced], wrap, label_max_point,
+                                               [r["max_time"] for r in reduced], [r["max_flow"] for r in reduced]))
+    finally:
+        if wrap and os.path.exists(body_file):
+            os.remove(body_file)
+    print(f"TikZ file generated: {output_file}")
+    return reduced
+
+
+def build_report(input_files, loader, output_file, time_min=None, time_max=None, num_points=150,
+                 marker_density=0.30, label_max_point=True, wrap=True, table_name="hydrograph_data", plot=False,
+                 stats_file=None, stats_threshold=0.0, workers=1, processes=True):
+    """
+    Reads every input file, reduces its outflow hydrograph and writes one TikZ figure.
+
+    Parameters:
+    - input_files: List of paths to hydrograph files.
+    - loader: Reader returning a DataFrame with "Time_h" and "Q_outflow" (e.g. load_csv_data).
+    - output_file: Path of the TikZ file.
+    - time_min, time_max, num_points, marker_density, label_max_point, wrap, table_name:
+      Visualization parameters (see write_tikz).
+    - plot: If True, also shows the Matplotlib figure (matplotlib is only imported in that case).
+    - stats_file: Optional CSV path for the statistics of the full (unfiltered) hydrographs.
+    - stats_threshold: Flow used for the time above threshold statistic (m³/s).
+    - workers: Number of parsing workers; above 1 the files are loaded and written with write_pipelined.
+    - processes: Use worker processes in the pipelined mode; threads only overlap the file reads
+      and the output, since the readers hold the GIL while parsing (see load_pipelined).
+
+    Returns:
+    - dict with "datasets", "labels", "times", "max_times", "max_flows" and "statistics"
+      (DataFrame, see hydrograph_stats.compute_statistics).
+    """
+    existing_files = []
+    for file in input_files:
+        if not os.path.exists(file):
+            print(f"Warning: File {file} not found.")
+            continue
+        existing_files.append(file)
+
+    pipelined = workers > 1 and len(existing_files) > 1
+    if pipelined:
+        reduced = write_pipelined(existing_files, loader, output_file, time_min, time_max, num_points,
+                                  marker_density, label_max_point, wrap, workers=workers, processes=processes,
+                                  stats_threshold=stats_threshold)
+    else:
+        reduced = [load_reduced(file, loader, time_min, time_max, num_points, stats_threshold)
+                   for file in existing_files]
+
+    datasets = [r["flows"] for r in reduced]
+    labels = [r["label"] for r in reduced]
+    times_list = [r["times"] for r in reduced]
+    max_times = [r["max_time"] for r in reduced]
+    max_flows = [r["max_flow"] for r in reduced]
+
+    if plot and datasets:
+        from hydrograph_plotter import plot_hydrographs
+        plot_hydrographs(datasets, labels, times_list, time_min=time_min, time_max=time_max,
+                         marker_density=marker_density, label_max_point=label_max_point,
+                         max_times=max_times, max_flows=max_flows)
+
+    # Save TikZ code
+    if not pipelined:
+        write_tikz(output_file, datasets, labels, times_list, wrap=wrap, table_name=table_name,
+                   time_min=time_min, time_max=time_max, marker_density=marker_density,
+                   label_max_point=label_max_point, max_times=max_times, max_flows=max_flows)
+
+    if reduced:
+        statistics = pd.concat([r["statistics"] for r in reduced], ignore_index=True)
+    else:
+        statistics = compute_statistics([], [], [], threshold=stats_threshold)
+    if stats_file:
+        statistics.to_csv(stats_file, index=False)
+
+    return {"datasets": datasets, "labels": labels, "times": times_list,
+            "max_times": max_times, "max_flows": max_flows, "statistics": statistics}
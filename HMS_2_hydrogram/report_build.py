@@ -0,0 +1,183 @@
+"""
+Incremental rebuild of the hydrograph report figures.
+
+Every figure (one TikZ file) is described by its inputs, reader and visualization
+parameters. Its build key is a SHA-256 over the content of the inputs, the source of
+the modules that produce it (reader, pipeline, writer) and the parameters. The keys of
+the last build are kept in a manifest, and only the figures whose key changed (or whose
+output is missing) are rebuilt. Input hashes are cached in the manifest by size and
+modification time, so unchanged files are not even read again.
+
+A build file is a JSON list of figures such as
+    [{"output": "_test/hydrograph_tikz_cuencasur2.tex",
+      "inputs": ["_test/cuencasur2_tr25_hydrogram.csv", "_test/cuencasur2_tr100_hydrogram.csv"],
+      "reader": "csv", "time_min": 0.5, "time_max": 3.5, "num_points": 500, "marker_density": 0.30}]
+
+Usage:
+    python cli.py report figures.json [--force]
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+
+from pipeline import build_report
+from instrumentation import get_logger, log_event, span
+
+MANIFEST_NAME = ".hydrograph_build.json"
+BUILD_VERSION = 1  # Bump to invalidate every manifest
+
+# Parameters of build_report tracked in the build key (defaults as in build_report)
+FIGURE_PARAMETERS = {
+    "time_min": None,
+    "time_max": None,
+    "num_points": 150,
+    "marker_density": 0.30,
+    "label_max_point": True,
+    "wrap": True,
+    "table_name": "hydrograph_data",
+}
+
+logger = get_logger("report")
+
+
+def get_loader(reader):
+    """Returns the reader function for "csv" (load_csv_data) or "hms" (load_data)."""
+    if reader == "hms":
+        from data_reader import load_data
+        return load_data
+    from data_reader_csv import load_csv_data
+    return load_csv_data
+
+
+def hash_bytes(path):
+    """SHA-256 of the content of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_file(path, cache):
+    """
+    Content hash of a file, reusing the cached hash while its size and modification time are unchanged.
+
+    Parameters:
+    - path: File path.
+    - cache: dict {path: {"size", "mtime_ns", "sha256"}} updated in place.
+    """
+    stat = os.stat(path)
+    entry = cache.get(path)
+    if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": hash_bytes(path)}
+        cache[path] = entry
+    return entry["sha256"]
+
+
+def code_version(reader):
+    """Hash of the source of the modules that produce a figure with the given reader."""
+    import data_writer
+    import pipeline
+    digest = hashlib.sha256()
+    for module in (inspect.getmodule(get_loader(reader)), pipeline, data_writer):
+        digest.update(hash_bytes(inspect.getsourcefile(module)).encode())
+    return digest.hexdigest()
+
+
+def figure_key(figure, cache, versions):
+    """
+    Build key of one figure.
+
+    Parameters:
+    - figure: Figure dict (see the module docstring), with absolute paths.
+    - cache: Input hash cache (see hash_file).
+    - versions: dict {reader: code_version} filled lazily.
+
+    Returns:
+    - Hex SHA-256 string, or None when an input is missing.
+    """
+    reader = figure.get("reader", "csv")
+    if reader not in versions:
+        versions[reader] = code_version(reader)
+    inputs = []
+    for path in figure["inputs"]:
+        if not os.path.exists(path):
+            return None
+        inputs.append(hash_file(path, cache))
+    parameters = {name: figure.get(name, default) for name, default in FIGURE_PARAMETERS.items()}
+    payload = json.dumps({"version": BUILD_VERSION, "reader": reader, "code": versions[reader],
+                          "inputs": inputs, "parameters": parameters}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_manifest(path):
+    """Reads a manifest ({"figures": {output: key}, "files": hash cache}); empty if missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"figures": {}, "files": {}}
+    manifest.setdefault("figures", {})
+    manifest.setdefault("files", {})
+    return manifest
+
+
+def save_manifest(path, manifest):
+    """Writes the manifest atomically (temporary file + rename)."""
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def build_figures(figures, base_dir=None, manifest_file=None, force=False, workers=1):
+    """
+    Rebuilds the stale figures of a report.
+
+    Parameters:
+    - figures: List of figure dicts, or path to a JSON file with that list.
+    - base_dir: Directory used to resolve relative paths (the JSON file folder by default).
+    - manifest_file: Manifest path (defaults to MANIFEST_NAME in base_dir).
+    - force: Rebuild every figure.
+    - workers: Parsing workers of every rebuild (see build_report).
+
+    Returns:
+    - List of (output path, status) with status "rebuilt", "up-to-date" or "missing-input".
+    """
+    if isinstance(figures, str):
+        base_dir = base_dir or os.path.dirname(os.path.abspath(figures))
+        with open(figures, "r", encoding="utf-8") as f:
+            figures = json.load(f)
+    base_dir = base_dir or os.getcwd()
+    manifest_file = manifest_file or os.path.join(base_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_file)
+    versions = {}
+
+    results = []
+    for figure in figures:
+        figure = dict(figure, output=os.path.join(base_dir, figure["output"]),
+                      inputs=[os.path.join(base_dir, path) for path in figure["inputs"]])
+        output = figure["output"]
+        with span("report.check", output=output):
+            key = figure_key(figure, manifest["files"], versions)
+        if key is None:
+            log_event(logging.WARNING, "report.missing_input", f"Falta un archivo de entrada de {output}",
+                      logger, output=output)
+            results.append((output, "missing-input"))
+            continue
+        if not force and manifest["figures"].get(output) == key and os.path.exists(output):
+            results.append((output, "up-to-date"))
+            continue
+
+        with span("report.build", output=output):
+            parameters = {name: figure.get(name, default) for name, default in FIGURE_PARAMETERS.items()}
+            build_report(figure["inputs"], get_loader(figure.get("reader", "csv")), output, workers=workers,
+                         **parameters)
+        manifest["figures"][output] = key
+        save_manifest(manifest_file, manifest)  # Keep finished figures if a later one fails
+        results.append((output, "rebuilt"))
+
+    save_manifest(manifest_file, manifest)
+    return results
@@ -1,11 +1,11 @@
 # %% Step 0: Loading
 import numpy as np
-import pandas as pd
 from auxiliars import calculate_CT, calculate_CA, calculate_CD
 from hyetogram_transform import transform_hyetogram
+from results import PrecipitationResult, UnitHydrograph
 
 # %% Step 1: Precipitation NRCS
-def generate_precipitation_nrcs(tc, P3_10, return_period, area, NC, I_min, d):
+def generate_precipitation_nrcs(tc, P3_10, return_period, area, NC, I_min, d, duration=None):
     """
     Generates the hyetograph using the NRCS methodology.
     :param tc: Time of concentration in hours.
@@ -14,39 +14,55 @@ def generate_precipitation_nrcs(tc, P3_10, return_period, area, NC, I_min, d):
     :param area: Basin area in km².
     :param NC: Curve number.
     :param I_min: Minimum infiltration rate in mm/h.
-    :return: Hyetograph (precipitation as a function of time).
+    :param d: Hyetograph interval in hours.
+    :param duration: Storm duration in hours; defaults to 12 * tc / 7 (see critical_duration.py).
+    :return: PrecipitationResult with the hyetograph (time, precipitation, infiltration and
+             effective precipitation); `.to_pandas()` gives the former DataFrame.
     """
 
-    D = tc / 7 * 12  # Total storm duration in hours
-    intervals = np.ceil(D / d).astype(int)
-    durations = [(i + 1) * d for i in range(intervals)]
-    P_max_values = []
+    durations, precipitation = design_hyetograph_nrcs(tc, P3_10, return_period, area, d, duration)
+    intervals = len(durations)
 
-    CT = calculate_CT(return_period)
+    effective_precipitation = correct_precipitation_infiltration(precipitation, NC, d, I_min)
 
-    for duration in durations:
-        CA = calculate_CA(area, duration)
-        CD = calculate_CD(duration)
-        P_max = P3_10 * CT * CA * CD
-        P_max_values.append(P_max)
+    # One contiguous block: time, precipitation, infiltration, effective precipitation
+    block = np.empty((4, intervals))
+    block[0] = durations
+    block[1] = precipitation
+    block[3] = effective_precipitation
+    np.subtract(block[1], block[3], out=block[2])
+    precipitation_nrcs = PrecipitationResult.from_block(block)
 
-    INCP = np.diff([0] + P_max_values)
-    
-    alternating_precipitation = distribute_precipitation_alternating(INCP)
+    return precipitation_nrcs
 
-    precipitation = alternating_precipitation
 
-    effective_precipitation = correct_precipitation_infiltration(precipitation, NC, d, I_min)
+def design_depth_curve(P3_10, return_period, area, durations):
+    """
+    Maximum precipitation depth P(d, Tr) = P3_10 * CT(Tr) * CA(Ac, d) * CD(d).
+    :param P3_10: Maximum precipitation in 3 hours with a 10-year return period.
+    :param return_period: Return period in years.
+    :param area: Basin area in km².
+    :param durations: Array of durations in hours.
+    :return: Array of depths (mm), one per duration.
+    """
+    durations = np.asarray(durations, dtype=float)
+    return P3_10 * calculate_CT(return_period) * calculate_CA(area, durations) * calculate_CD(durations)
+
 
-    precipitation_nrcs = pd.DataFrame({
-        "Time (hours)": durations,
-        "Precipitation (mm)": precipitation,
-        "Infiltration (mm)": precipitation - effective_precipitation,
-        "Effective Precipitation (mm)": effective_precipitation
-    })
+def design_hyetograph_nrcs(tc, P3_10, return_period, area, d, duration=None):
+    """
+    Design storm distributed with the alternating block method.
+    :param duration: Storm duration in hours; defaults to 12 * tc / 7.
+    :return: (durations, precipitation) arrays; durations are the end times of every interval.
+    """
+    D = duration if duration is not None else tc / 7 * 12  # Total storm duration in hours
+    intervals = int(np.ceil(D / d))
+    durations = (np.arange(intervals) + 1) * d
 
+    P_max_values = design_depth_curve(P3_10, return_period, area, durations)
+    INCP = np.diff(P_max_values, prepend=0)
 
-    return precipitation_nrcs
+    return durations, distribute_precipitation_alternating(INCP)
 
 
 def distribute_precipitation_alternating(INCP):
@@ -59,57 +75,53 @@ def distribute_precipitation_alternating(INCP):
     Returns:
         array: Array of precipitation values distributed using the alternating block method.
     """
-    n = len(INCP)
     INCP_sorted = np.sort(INCP)[::-1]  # Sort increments in descending order
     alternating_block = np.zeros_like(INCP_sorted)
-
-    # Place the maximum value in the center
-    mid_index = n // 2
-    alternating_block[mid_index] = INCP_sorted[0]
-
-    # Alternate remaining values left and right
-    left, right = mid_index - 1, mid_index + 1
-    for i in range(1, n):
-        if i % 2 == 0:  # Odd index: place to the right
-            if right < n:  # Ensure within bounds
-                print(i, "right",right, INCP_sorted[i])
-                alternating_block[right] = INCP_sorted[i]
-                right += 1
-        else:  # Even index: place to the left
-            if left >= 0:  # Ensure within bounds
-                print(i, "left",left, INCP_sorted[i])
-                alternating_block[left] = INCP_sorted[i]
-                left -= 1
+    alternating_block[alternating_block_positions(len(INCP_sorted))] = INCP_sorted
 
     return alternating_block
 
 
+def alternating_block_positions(n):
+    """
+    Position of the i-th largest increment in an alternating block hyetograph of n intervals.
+
+    The maximum goes to the center (n // 2); the following values alternate left (odd i)
+    and right (even i) of it. `n` may be an array, giving one row of positions per length
+    (entries i >= n of a row are not meaningful).
+    """
+    n = np.asarray(n)
+    i = np.arange(np.max(n)) if n.ndim else np.arange(n)
+    offsets = np.where(i % 2 == 1, -((i + 1) // 2), i // 2)
+    return (n // 2)[..., np.newaxis] + offsets if n.ndim else n // 2 + offsets
+
+
 def correct_precipitation_infiltration(precipitation, curve_number, d, I_min):
     """
     Corrects precipitation for infiltration using the curve number.
-    :param precipitation: Array of precipitation values (hyetograph).
-    :param curve_number: Curve number (CN).
+    :param precipitation: Array of precipitation values (hyetograph); the last axis is time.
+    :param curve_number: Curve number (CN), or an array of curve numbers to evaluate the
+                         same hyetograph for every one of them (one output row per CN).
     :param d: Duration increment.
     :param I_min: Minimum infiltration rate in mm/h.
     :return: Array of corrected precipitation values.
     """
+    curve_number = np.asarray(curve_number, dtype=float)
     S = (25400 / curve_number) - 254  # Maximum retention capacity
+    if S.ndim:
+        S = S[..., np.newaxis]  # One row per curve number
     Ia = 0.2 * S  # Initial abstraction
 
     # Calculate cumulative precipitation
-    cumulative_precipitation = np.cumsum(precipitation)
+    cumulative_precipitation = np.cumsum(precipitation, axis=-1)
 
     # Correct cumulative precipitation
-    runoff_accumulated = np.zeros_like(cumulative_precipitation)
-
-    for i, P in enumerate(cumulative_precipitation):
-        if P > Ia:
-            runoff_accumulated[i] = ((P - Ia) ** 2) / (P + 0.8 * S)
-        else:
-            runoff_accumulated[i] = 0
+    excess = np.maximum(cumulative_precipitation - Ia, 0)
+    denominator = cumulative_precipitation + 0.8 * S
+    runoff_accumulated = np.divide(excess ** 2, denominator, out=np.zeros(np.shape(denominator)), where=excess > 0)
 
     # Calculate incremental runoff
-    incremental_runoff = np.diff([0] + runoff_accumulated.tolist())
+    incremental_runoff = np.diff(runoff_accumulated, axis=-1, prepend=0)
 
     # Calculate deficit (storage)
     deficit = precipitation - incremental_runoff
@@ -130,6 +142,28 @@ def convolve_hydrograph(precipitation, unit_hydrograph):
     """
     return np.convolve(unit_hydrograph, precipitation, )[:len(precipitation)]
 
+FFT_ROUNDOFF = 1e-12  # Relative magnitude of the FFT round-off zeroed by convolve_hydrograph_batch
+
+def convolve_hydrograph_batch(precipitation, unit_hydrograph, length=None):
+    """
+    Convolves many effective hyetographs with many unit hydrographs at once (FFT along the last axis).
+    :param precipitation: Array (..., n) of effective precipitation per interval (mm).
+    :param unit_hydrograph: Array (..., k) of unit hydrograph ordinates sampled at the same interval,
+                            broadcastable against `precipitation`.
+    :param length: Number of output samples (defaults to the full length n + k - 1).
+    :return: Array (..., length) of flows; sample i corresponds to time (i + 1) * d. Like np.convolve,
+             negative effective precipitation (P < I_min * d) gives negative flows.
+    """
+    precipitation = np.asarray(precipitation, dtype=float)
+    unit_hydrograph = np.asarray(unit_hydrograph, dtype=float)
+    full = precipitation.shape[-1] + unit_hydrograph.shape[-1] - 1
+    nfft = 1 << (full - 1).bit_length()
+    flows = np.fft.irfft(np.fft.rfft(precipitation, nfft) * np.fft.rfft(unit_hydrograph, nfft), nfft)[..., :full]
+    # Zero the FFT round-off (e.g. tiny negatives where the direct convolution gives 0), keep real values
+    roundoff = FFT_ROUNDOFF * np.max(np.abs(flows), axis=-1, keepdims=True)
+    flows = np.where(np.abs(flows) <= roundoff, 0.0, flows)
+    return flows[..., :length or full]
+
 # %% Step 1: Hydrograph
 
 def generate_unit_hydrograph_nrcs(tc, area):
@@ -137,7 +171,7 @@ def generate_unit_hydrograph_nrcs(tc, area):
     Generates the hydrograph using the NRCS methodology.
     :param tc: Time of concentration in hours.
     :param area: Basin area in km².
-    :return: Hydrograph (flow as a function of time).
+    :return: UnitHydrograph (time, flow); unpacks as `time_steps, hydrograph`.
     """
     X = 1.67  # Factor for calculating the base time of the NRCS
     d = tc / 7
@@ -147,12 +181,100 @@ def generate_unit_hydrograph_nrcs(tc, area):
     Tb = (1 + X) * Tp  # Total base time of the hydrograph
     qp = 0.208 * (area / Tp)  # Peak flow
 
-    time_steps = np.linspace(0, Tb, 100)  # 100 time steps for the hydrograph
-    hydrograph = np.zeros_like(time_steps)
+    block = np.zeros((2, 100))
+    time_steps, hydrograph = block
+    time_steps[:] = np.linspace(0, Tb, 100)  # 100 time steps for the hydrograph
 
     # Rising limb (from 0 to Tp)
     hydrograph[time_steps <= Tp] = (qp / Tp) * time_steps[time_steps <= Tp]
     # Falling limb (from Tp to Tb)
     hydrograph[time_steps > Tp] = qp * (1 - (time_steps[time_steps > Tp] - Tp) / (Tb - Tp))
 
-    return time_steps, hydrograph
\ No newline at end of file
+    return UnitHydrograph.from_block(block)
+
+# %% Step 1: Clark unit hydrograph
+
+def time_area_fraction(relative_time):
+    """
+    Cumulative contributing area of the HEC-HMS time-area curve.
+    :param relative_time: t / tc (array); values are clipped to [0, 1].
+    :return: Fraction of the basin area contributing at that time.
+    """
+    x = np.clip(relative_time, 0, 1)
+    return np.where(x <= 0.5, 1.414 * x ** 1.5, 1 - 1.414 * (1 - x) ** 1.5)
+
+def sample_unit_hydrograph_clark(tc, storage, area, dt, tolerance=1e-6):
+    """
+    Clark unit hydrograph (time-area histogram routed through a linear reservoir) sampled
+    every `dt` hours, for one or many basins.
+    The reservoir recursion O_i = c * I_i + (1 - c) * O_(i-1), with c = dt / (R + dt / 2), is
+    evaluated for all basins at once as the convolution of the inflow with its impulse
+    response c * (1 - c)^k, truncated once (1 - c)^k drops below `tolerance`.
+    :param tc: Time of concentration in hours (scalar or array).
+    :param storage: Storage coefficient R in hours (scalar or array broadcastable against tc).
+    :param area: Basin area in km² (scalar or array broadcastable against tc).
+    :param dt: Sampling interval in hours (the hyetograph interval d); at most 2 R, since the
+               recursion oscillates for c > 1.
+    :return: (time, ordinates) with time = (i + 1) * dt and ordinates of shape tc.shape + (n,)
+             in m³/s per mm of effective precipitation.
+    """
+    tc, storage, area = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (tc, storage, area)))
+    if np.any(storage <= 0):
+        raise ValueError("The Clark storage coefficient must be positive.")
+    if np.any(dt > 2 * storage):
+        raise ValueError(f"The Clark time step ({dt} h) must not exceed twice the storage coefficient "
+                         f"({2 * np.min(storage)} h).")
+
+    # Time-area histogram converted to reservoir inflow (1 mm over A km² in dt hours)
+    m = int(np.ceil(np.max(tc) / dt))
+    edges = np.arange(m + 1) * dt
+    increments = np.diff(time_area_fraction(edges / tc[..., np.newaxis]), axis=-1)
+    inflow = 0.2778 * area[..., np.newaxis] * increments / dt
+
+    # Linear reservoir as a batched filter
+    c = dt / (storage + 0.5 * dt)
+    decay = 1 - c
+    with np.errstate(divide="ignore"):
+        lengths = np.where(decay > 0, np.ceil(np.log(tolerance) / np.log(decay)), 1)
+    k = np.arange(int(np.max(lengths)))
+    response = c[..., np.newaxis] * (1 - c[..., np.newaxis]) ** k
+    outflow = convolve_hydrograph_batch(inflow, response)
+
+    # Unit hydrograph ordinate: mean outflow of consecutive steps (O_0 = 0)
+    ordinates = (outflow + np.concatenate([np.zeros(outflow.shape[:-1] + (1,)), outflow[..., :-1]], axis=-1)) / 2
+    time = (np.arange(ordinates.shape[-1]) + 1) * dt
+    return time, ordinates
+
+def generate_unit_hydrograph_clark(tc, storage, area, dt=None):
+    """
+    Clark unit hydrograph of one basin, sampled like generate_unit_hydrograph_nrcs: 100 time
+    steps from 0 to the end of the recession.
+    :param tc: Time of concentration in hours.
+    :param storage: Storage coefficient R in hours.
+    :param area: Basin area in km².
+    :param dt: Routing time step in hours (defaults to min(tc / 7, R)).
+    :return: UnitHydrograph (time, flow); unpacks as `time_steps, hydrograph`.
+    """
+    dt = dt or min(tc / 7, storage)
+    time, ordinates = sample_unit_hydrograph_clark(tc, storage, area, dt)
+    time_steps = np.linspace(0, time[-1], 100)  # 100 time steps for the hydrograph
+    return UnitHydrograph(time_steps, np.interp(time_steps, np.concatenate([[0.0], time]),
+                                                np.concatenate([[0.0], ordinates])))
+
+UNIT_HYDROGRAPH_METHODS = ("nrcs", "clark")
+
+def generate_unit_hydrograph(tc, area, method="nrcs", storage=None):
+    """
+    Unit hydrograph of the selected method with 100 time steps, as used by the scripts
+    (convolve_hydrograph(unit_hydrograph, effective_precipitation)).
+    :param method: "nrcs" (triangular) or "clark" (requires the storage coefficient).
+    :param storage: Clark storage coefficient R in hours.
+    :return: UnitHydrograph (time, flow).
+    """
+    if method == "clark":
+        if storage is None:
+            raise ValueError("The Clark unit hydrograph requires the storage coefficient R.")
+        return generate_unit_hydrograph_clark(tc, storage, area)
+    if method != "nrcs":
+        raise ValueError(f"Unknown unit hydrograph method: {method}")
+    return generate_unit_hydrograph_nrcs(tc, area)
@@ -8,12 +8,35 @@ def calculate_CT(return_period):
     return 0.5786 - 0.4312 * np.log10(ln_term)
 
 def calculate_CD(duration):
-    """Calculate CD(d) based on the given formula."""
-    if duration <= 3:
-        return (0.6208 * duration) / ((duration + 0.0137) ** 0.5639)
-    else:
-        return (1.0287 * duration) / ((duration + 1.0293) ** 0.8083)
+    """Calculate CD(d) based on the given formula (d may be an array of durations)."""
+    if np.ndim(duration) == 0:
+        if duration <= 3:
+            return (0.6208 * duration) / ((duration + 0.0137) ** 0.5639)
+        else:
+            return (1.0287 * duration) / ((duration + 1.0293) ** 0.8083)
+    duration = np.asarray(duration, dtype=float)
+    return np.where(duration <= 3,
+                    (0.6208 * duration) / ((duration + 0.0137) ** 0.5639),
+                    (1.0287 * duration) / ((duration + 1.0293) ** 0.8083))
 
 def calculate_CA(area, duration):
     """Calculate CA(Ac,d) based on the given formula."""
     return 1.0 - (0.3549 * duration ** -0.4272) * (1.0 - np.exp(-0.005792 * area))
+
+def interpolate_rows(x_new, x, rows, fill_value=0.0):
+    """
+    Linear interpolation of many series sharing the same abscissa, in one vectorized step.
+    :param x_new: Points where the series are evaluated.
+    :param x: Increasing abscissa shared by every series.
+    :param rows: Array (..., len(x)) of series values.
+    :param fill_value: Value returned outside [x[0], x[-1]].
+    :return: Array (..., len(x_new)).
+    """
+    x_new = np.asarray(x_new, dtype=float)
+    x = np.asarray(x, dtype=float)
+    rows = np.asarray(rows, dtype=float)
+    idx = np.clip(np.searchsorted(x, x_new, side="right") - 1, 0, len(x) - 2)
+    weight = (x_new - x[idx]) / (x[idx + 1] - x[idx])
+    result = rows[..., idx] * (1 - weight) + rows[..., idx + 1] * weight
+    result[..., (x_new < x[0]) | (x_new > x[-1])] = fill_value
+    return result
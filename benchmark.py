@@ -0,0 +1,339 @@
+"""
+Benchmark suite for the NRCS pipeline and the HMS_2_hydrogram I/O.
+
+Usage:
+    python benchmark.py run [--sizes 1000 10000] [--repeat 5] [--output benchmark_baseline.json]
+    python benchmark.py compare benchmark_baseline.json benchmark_current.json [--threshold 0.10]
+
+`run` times every case on the `_test` fixtures and on synthetic inputs of the
+requested sizes and stores the results as JSON. `compare` reads two of those
+files and flags every case whose median time grew more than `threshold`.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+from hms_path import ROOT_DIR, HMS_DIR
+from NRCS import (generate_precipitation_nrcs, correct_precipitation_infiltration,
+                  convolve_hydrograph, generate_unit_hydrograph_nrcs, sample_unit_hydrograph_clark)
+from data_reader import load_data
+from data_reader_csv import load_csv_data
+from data_writer import write_tikz
+
+TEST_DIR = os.path.join(HMS_DIR, "_test")
+CLI_PATH = os.path.join(ROOT_DIR, "cli.py")
+
+DEFAULT_SIZES = [10**3, 10**4, 10**5]
+FULL_SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_OUTPUT = "benchmark_baseline.json"
+SEED = 20250101
+
+# Cold start of the command-line entry point: (case, arguments, target median in seconds)
+COLD_START_CASES = [
+    ("--help", ["--help"], 0.15),
+    ("nrcs", ["nrcs", "--tc", "0.6", "--area", "1.21", "--p3-10", "83", "--tr", "100", "--cn", "79",
+              "--i-min", "1.2", "-o", os.devnull], 0.30),
+]
+
+# Reference basin used by every synthetic case (values of script_edenrock.py)
+BASIN = {"tc": 0.6, "P3_10": 83, "return_period": 100, "area": 1.21, "NC": 79, "I_min": 1.2}
+
+
+# ==========================
+# SYNTHETIC INPUTS
+# ==========================
+def synthetic_precipitation(size, rng):
+    """Random hyetograph (mm per interval) with `size` intervals."""
+    return rng.gamma(0.8, 1.5, size)
+
+
+def write_synthetic_csv(file_path, size, rng):
+    """Writes a `Date,Time,Total Flow (M3/S)` file with `size` rows at 2-minute steps (load_csv_data format)."""
+    minutes = np.arange(size) * 2
+    flows = np.round(rng.gamma(2.0, 3.0, size), 1)
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("Date,Time,Total Flow (M3/S)\n")
+        f.writelines(f"1-Jan-00,{m // 60}:{m % 60:02d},{q}\n" for m, q in zip(minutes, flows))
+
+
+def write_synthetic_hms(file_path, size, rng):
+    """Writes a file with decimal commas split into separate tokens (load_data format)."""
+    minutes = np.arange(size) * 2
+    q_in = rng.integers(0, 100, (size, 2))
+    q_out = rng.integers(0, 100, (size, 2))
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("Date,Time,Inflow,Outflow\n")
+        f.writelines(f"01Jan2000,{m // 60:02d}:{m % 60:02d},{a},{b},{c},{e}\n"
+                     for m, (a, b), (c, e) in zip(minutes, q_in, q_out))
+
+
+# ==========================
+# CASES
+# ==========================
+def case_design_storm(size, rng, tmp_dir):
+    D = BASIN["tc"] / 7 * 12
+    d = D / size
+    return lambda: generate_precipitation_nrcs(BASIN["tc"], BASIN["P3_10"], BASIN["return_period"],
+                                               BASIN["area"], BASIN["NC"], BASIN["I_min"], d)
+
+
+def case_losses(size, rng, tmp_dir):
+    precipitation = synthetic_precipitation(size, rng)
+    d = 5 / 60
+    return lambda: correct_precipitation_infiltration(precipitation, BASIN["NC"], d, BASIN["I_min"])
+
+
+def case_convolution(size, rng, tmp_dir):
+    precipitation = synthetic_precipitation(size, rng)
+    _, unit_hydrograph = generate_unit_hydrograph_nrcs(BASIN["tc"], BASIN["area"])
+    return lambda: convolve_hydrograph(precipitation, unit_hydrograph)
+
+
+def case_clark_batch(size, rng, tmp_dir):
+    # About 1000 ordinates per basin: size / 1000 basins routed together
+    basins = max(1, size // 1000)
+    tc = rng.uniform(0.3, 3.0, basins)
+    storage = tc * rng.uniform(0.3, 1.5, basins)
+    return lambda: sample_unit_hydrograph_clark(tc, storage, BASIN["area"], 5 / 60)
+
+
+def case_csv_parsing(size, rng, tmp_dir):
+    file_path = os.path.join(tmp_dir, f"synthetic_{size}.csv")
+    write_synthetic_csv(file_path, size, rng)
+    return lambda: load_csv_data(file_path)
+
+
+def case_hms_parsing(size, rng, tmp_dir):
+    file_path = os.path.join(tmp_dir, f"synthetic_hms_{size}.csv")
+    write_synthetic_hms(file_path, size, rng)
+    return lambda: load_data(file_path)
+
+
+def case_tikz_writing(size, rng, tmp_dir):
+    times = (np.arange(size) / 30).tolist()
+    flows = rng.gamma(2.0, 3.0, size).tolist()
+    file_path = os.path.join(tmp_dir, f"synthetic_{size}.tex")
+    return lambda: write_tikz(file_path, [flows], ["synthetic"], [times], wrap=True,
+                              label_max_point=True, max_times=[times[0]], max_flows=[max(flows)])
+
+
+SYNTHETIC_CASES = {
+    "nrcs.design_storm": case_design_storm,
+    "nrcs.losses": case_losses,
+    "nrcs.convolution": case_convolution,
+    "nrcs.clark_batch": case_clark_batch,
+    "io.csv_parsing": case_csv_parsing,
+    "io.hms_parsing": case_hms_parsing,
+    "io.tikz_writing": case_tikz_writing,
+}
+
+
+def fixture_cases(tmp_dir):
+    """Yields (name, size, callable) for every `_test` fixture."""
+    for file_name in sorted(os.listdir(TEST_DIR)):
+        file_path = os.path.join(TEST_DIR, file_name)
+        if file_name.endswith("_hydrogram.csv"):
+            size = len(load_csv_data(file_path))
+            yield f"fixture.csv_parsing[{file_name}]", size, (lambda p=file_path: load_csv_data(p))
+
+    csv_files = [os.path.join(TEST_DIR, f) for f in sorted(os.listdir(TEST_DIR)) if f.endswith("_hydrogram.csv")]
+    frames = [load_csv_data(f) for f in csv_files]
+    datasets = [df["Q_outflow"].tolist() for df in frames]
+    times = [df["Time_h"].tolist() for df in frames]
+    labels = [os.path.splitext(os.path.basename(f))[0] for f in csv_files]
+    output = os.path.join(tmp_dir, "fixtures.tex")
+    yield ("fixture.tikz_writing", sum(len(t) for t in times),
+           lambda: write_tikz(output, datasets, labels, times, wrap=True, max_flows=[max(q) for q in datasets]))
+
+    try:
+        from hecdss import HecDss
+    except ImportError:
+        return
+    with open(os.path.join(TEST_DIR, "Tr25_NRCS_catalog"), "r", encoding="utf-8") as f:
+        pathname = next(line.strip() for line in f if "/FLOW/01Jan2000/" in line)
+    dss_path = os.path.join(TEST_DIR, "TR25.dss")
+
+    def read_dss():
+        with HecDss(dss_path) as dss:
+            return dss.get(pathname)
+
+    yield "fixture.dss_parsing[TR25.dss]", len(read_dss().values), read_dss
+
+
+def cold_start_cases():
+    """Yields (name, arguments, target_s, callable) timing a fresh interpreter running cli.py."""
+    for name, arguments, target_s in COLD_START_CASES:
+        command = [sys.executable, CLI_PATH] + arguments
+        yield (f"cli.cold_start[{name}]", arguments, target_s,
+               lambda c=command: subprocess.run(c, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+
+
+# ==========================
+# RUNNER
+# ==========================
+def time_callable(func, repeat):
+    """Runs `func` once as warm-up and `repeat` more times, returning wall times in seconds."""
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        func()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def environment_info():
+    import pandas as pd
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def run_benchmarks(sizes=None, repeat=DEFAULT_REPEAT, cases=None, include_fixtures=True, include_cold_start=True):
+    """
+    Runs the benchmark cases and returns the results as a JSON-serializable dict.
+    :param sizes: Synthetic input sizes (number of samples).
+    :param repeat: Timed repetitions per case.
+    :param cases: Names of the synthetic cases to run (all of them by default).
+    :param include_fixtures: Also time the `_test` fixtures.
+    :param include_cold_start: Also time the start-up of `cli.py` in a fresh interpreter.
+    :return: Dict with "environment" and "results" (keyed "case@size").
+    """
+    sizes = sizes or DEFAULT_SIZES
+    selected = {name: SYNTHETIC_CASES[name] for name in (cases or SYNTHETIC_CASES)}
+    results = {}
+
+    def record(name, size, func, target_s=None):
+        samples = time_callable(func, repeat)
+        median = statistics.median(samples)
+        results[f"{name}@{size}"] = {
+            "case": name,
+            "size": size,
+            "median_s": median,
+            "min_s": min(samples),
+            "samples_s": samples,
+            "target_s": target_s,
+        }
+        over = "  OVER TARGET" if target_s is not None and median > target_s else ""
+        print(f"{name:<45} n={size:<10} median={median * 1e3:10.3f} ms{over}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir, warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if include_cold_start:
+            for name, _, target_s, func in cold_start_cases():
+                record(name, 1, func, target_s)
+        if include_fixtures:
+            for name, size, func in fixture_cases(tmp_dir):
+                record(name, size, func)
+        for name, factory in selected.items():
+            for size in sizes:
+                rng = np.random.default_rng(SEED)
+                record(name, size, factory(size, rng, tmp_dir))
+
+    return {"environment": environment_info(), "repeat": repeat, "results": results}
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares two benchmark result dicts.
+    :param baseline: Results produced by `run_benchmarks` (reference).
+    :param current: Results produced by `run_benchmarks` (candidate).
+    :param threshold: Relative slowdown of the median above which a case is a regression.
+    :return: List of (key, baseline_s, current_s, ratio, status) rows; cases with a `target_s`
+             (cold start) are also flagged when the current median exceeds the target.
+    """
+    rows = []
+    for key, base in baseline["results"].items():
+        if key not in current["results"]:
+            rows.append((key, base["median_s"], None, None, "missing"))
+            continue
+        now = current["results"][key]["median_s"]
+        target_s = current["results"][key].get("target_s")
+        ratio = now / base["median_s"] if base["median_s"] > 0 else float("inf")
+        if target_s is not None and now > target_s:
+            status = "OVER TARGET"
+        elif ratio > 1 + threshold:
+            status = "REGRESSION"
+        elif ratio < 1 - threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((key, base["median_s"], now, ratio, status))
+    for key in current["results"].keys() - baseline["results"].keys():
+        rows.append((key, None, current["results"][key]["median_s"], None, "new"))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and write a JSON result file.")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=None, help="Synthetic input sizes.")
+    run_parser.add_argument("--full", action="store_true", help="Use sizes from 10^3 up to 10^7.")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument("--cases", nargs="+", choices=sorted(SYNTHETIC_CASES), default=None)
+    run_parser.add_argument("--no-fixtures", action="store_true", help="Skip the _test fixtures.")
+    run_parser.add_argument("--no-cold-start", action="store_true", help="Skip the cli.py start-up cases.")
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two JSON result files.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        sizes = FULL_SIZES if args.full else args.sizes
+        results = run_benchmarks(sizes, args.repeat, args.cases, not args.no_fixtures, not args.no_cold_start)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to: {args.output}")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare_results(baseline, current, args.threshold)
+    regressions = 0
+    for key, base, now, ratio, status in sorted(rows):
+        base_ms = f"{base * 1e3:10.3f}" if base is not None else f"{'-':>10}"
+        now_ms = f"{now * 1e3:10.3f}" if now is not None else f"{'-':>10}"
+        ratio_txt = f"{ratio:6.2f}x" if ratio is not None else f"{'-':>7}"
+        print(f"{key:<55} {base_ms} ms -> {now_ms} ms  {ratio_txt}  {status}")
+        regressions += status in ("REGRESSION", "OVER TARGET")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%} or over the cold-start target.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
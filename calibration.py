@@ -0,0 +1,233 @@
+"""
+Batched calibration of the curve number (CN) and the time of concentration (tc)
+against HEC-HMS reference hydrographs.
+
+The NRCS model of NRCS.py is evaluated for a whole grid of (CN, tc) candidates:
+for every tc the design hyetograph and the unit hydrograph are built once, the
+losses of all CN values are computed as one 2-D array and convolved together.
+The best grid point is then refined with a bounded Nelder-Mead search.
+
+The simulated hydrographs are those of the scripts and `cli.py nrcs`: the effective
+precipitation is convolved with the 100-point unit hydrograph of generate_unit_hydrograph,
+and the result keeps the first 100 samples on the unit hydrograph time axis.
+
+Usage:
+    python cli.py calibrate basins.json [-o calibration.csv]
+
+where basins.json is a list of basins such as
+    {"name": "cuencasur2_tr25", "reference": "HMS_2_hydrogram/_test/cuencasur2_tr25_hydrogram.csv",
+     "area": 1.21, "P3_10": 83, "return_period": 25, "I_min": 1.2, "tc": 0.8, "NC": 75, "d": 0.0833}
+
+Clark unit hydrographs are used with "unit_hydrograph": "clark" and the storage coefficient "R" (h).
+"""
+import json
+import os
+
+import numpy as np
+from auxiliars import interpolate_rows
+from NRCS import (design_hyetograph_nrcs, correct_precipitation_infiltration,
+                  generate_unit_hydrograph, convolve_hydrograph_batch)
+
+CN_RANGE = (30.0, 99.0)  # Admissible curve numbers
+TC_FACTORS = (0.25, 4.0)  # Admissible tc, relative to the initial tc
+GRID_SIZE = 25  # Grid points per parameter
+DEFAULT_D = 5 / 60  # Hyetograph interval (h)
+
+
+def load_reference_hydrograph(file_path, reader="csv"):
+    """
+    Reads a HEC-HMS hydrograph with the HMS_2_hydrogram readers (see hydrograph_comparison.load_hydrograph).
+    :param file_path: Path to the exported hydrograph.
+    :param reader: "csv" (load_csv_data) or "hms" (load_data).
+    :return: (times in hours elapsed since the start, increasing across midnight; flows in m³/s) arrays.
+    """
+    from hydrograph_comparison import load_hydrograph
+    return load_hydrograph(file_path, reader)
+
+
+def simulate_hydrographs(curve_numbers, tc, times, area, P3_10, return_period, I_min, d, method="nrcs", storage=None):
+    """
+    NRCS hydrographs of one tc and many curve numbers, evaluated at `times`; each row is
+    the hydrograph the scripts compute (convolve_hydrograph(unit_hydrograph, effective)).
+    :param curve_numbers: Array (m,) of curve numbers.
+    :param tc: Time of concentration in hours.
+    :param times: Array of times (h) where the hydrographs are returned (0 after the last model time).
+    :param method: Unit hydrograph, "nrcs" or "clark" (see NRCS.generate_unit_hydrograph).
+    :param storage: Clark storage coefficient R in hours.
+    :return: Array (m, len(times)) of flows (m³/s).
+    """
+    _, precipitation = design_hyetograph_nrcs(tc, P3_10, return_period, area, d)
+    effective = correct_precipitation_infiltration(precipitation, np.atleast_1d(curve_numbers), d, I_min)
+    time_steps, unit_hydrograph = generate_unit_hydrograph(tc, area, method, storage)
+    flows = convolve_hydrograph_batch(effective, unit_hydrograph, length=len(time_steps))
+    return interpolate_rows(times, time_steps, flows)
+
+
+def fit_metrics(simulated, observed, times):
+    """
+    Goodness of fit of one or many simulated hydrographs.
+    :param simulated: Array (..., n) of simulated flows.
+    :param observed: Array (n,) of reference flows.
+    :param times: Array (n,) of times (h).
+    :return: dict of arrays: nse, peak_error and volume_error (relative), peak_time_error (h).
+             nse, peak_error and volume_error are NaN when the reference is flat, has no peak or no volume.
+    """
+    simulated = np.asarray(simulated, dtype=float)
+    observed = np.asarray(observed, dtype=float)
+    residual = np.sum((simulated - observed) ** 2, axis=-1)
+    variance = np.sum((observed - observed.mean()) ** 2)
+    dt = np.diff(times)
+    volume_obs = np.sum((observed[1:] + observed[:-1]) * dt) / 2
+    volume_sim = np.sum((simulated[..., 1:] + simulated[..., :-1]) * dt, axis=-1) / 2
+    peak_obs = observed.max()
+    return {
+        "nse": 1 - residual / variance if variance > 0 else np.full(residual.shape, np.nan),
+        "peak_error": (simulated.max(axis=-1) - peak_obs) / peak_obs if peak_obs != 0
+        else np.full(residual.shape, np.nan),
+        "volume_error": (volume_sim - volume_obs) / volume_obs if volume_obs != 0
+        else np.full(residual.shape, np.nan),
+        "peak_time_error": times[np.argmax(simulated, axis=-1)] - times[np.argmax(observed)],
+    }
+
+
+def evaluate_grid(times, observed, cn_values, tc_values, area, P3_10, return_period, I_min, d, method="nrcs",
+                  storage=None):
+    """
+    NSE of every (tc, CN) combination; each tc is evaluated for all CN values in one batch.
+    :return: Array (len(tc_values), len(cn_values)).
+    """
+    nse = np.empty((len(tc_values), len(cn_values)))
+    for i, tc in enumerate(tc_values):
+        simulated = simulate_hydrographs(cn_values, tc, times, area, P3_10, return_period, I_min, d, method, storage)
+        nse[i] = fit_metrics(simulated, observed, times)["nse"]
+    return nse
+
+
+def nelder_mead(func, x0, steps, bounds, xtol=1e-4, ftol=1e-8, max_iter=200):
+    """
+    Derivative-free Nelder-Mead minimization; points are clipped to `bounds`.
+    :param func: Objective function of an array of parameters.
+    :param x0: Starting point.
+    :param steps: Initial simplex size along every parameter.
+    :param bounds: (lower, upper) arrays.
+    :return: (best point, best value, number of evaluations).
+    """
+    lower, upper = (np.asarray(b, dtype=float) for b in bounds)
+    clip = lambda x: np.clip(x, lower, upper)
+    n = len(x0)
+    simplex = [clip(np.asarray(x0, dtype=float))]
+    for i in range(n):
+        vertex = simplex[0].copy()
+        vertex[i] += steps[i] if vertex[i] + steps[i] <= upper[i] else -steps[i]
+        simplex.append(clip(vertex))
+    values = [func(x) for x in simplex]
+    evaluations = n + 1
+
+    for _ in range(max_iter):
+        order = np.argsort(values)
+        simplex = [simplex[i] for i in order]
+        values = [values[i] for i in order]
+        spread = np.max(np.abs(np.array(simplex[1:]) - simplex[0]) / np.maximum(np.abs(simplex[0]), 1e-12))
+        if spread < xtol and values[-1] - values[0] < ftol:
+            break
+
+        centroid = np.mean(simplex[:-1], axis=0)
+        reflected = clip(centroid + (centroid - simplex[-1]))
+        f_reflected = func(reflected)
+        evaluations += 1
+        if f_reflected < values[0]:
+            expanded = clip(centroid + 2 * (centroid - simplex[-1]))
+            f_expanded = func(expanded)
+            evaluations += 1
+            simplex[-1], values[-1] = (expanded, f_expanded) if f_expanded < f_reflected else (reflected, f_reflected)
+        elif f_reflected < values[-2]:
+            simplex[-1], values[-1] = reflected, f_reflected
+        else:
+            contracted = clip(centroid + 0.5 * (simplex[-1] - centroid))
+            f_contracted = func(contracted)
+            evaluations += 1
+            if f_contracted < values[-1]:
+                simplex[-1], values[-1] = contracted, f_contracted
+            else:
+                # Shrink towards the best vertex
+                for i in range(1, n + 1):
+                    simplex[i] = simplex[0] + 0.5 * (simplex[i] - simplex[0])
+                    values[i] = func(simplex[i])
+                evaluations += n
+
+    best = int(np.argmin(values))
+    return simplex[best], values[best], evaluations
+
+
+def calibrate_basin(times, observed, area, P3_10, return_period, I_min, tc, d=None,
+                    cn_range=CN_RANGE, tc_range=None, grid_size=GRID_SIZE, method="nrcs", storage=None):
+    """
+    Best-fit CN and tc of one basin (maximum Nash-Sutcliffe efficiency).
+    :param times: Reference times (h).
+    :param observed: Reference flows (m³/s).
+    :param area: Basin area in km².
+    :param P3_10: Maximum precipitation in 3 hours with a 10-year return period.
+    :param return_period: Return period in years.
+    :param I_min: Minimum infiltration rate in mm/h.
+    :param tc: Initial time of concentration in hours (centre of the tc search range).
+    :param d: Hyetograph interval in hours (defaults to 5 minutes).
+    :param cn_range: (min, max) curve number.
+    :param tc_range: (min, max) tc in hours; defaults to TC_FACTORS * tc.
+    :param grid_size: Number of grid points per parameter.
+    :param method: Unit hydrograph, "nrcs" or "clark".
+    :param storage: Clark storage coefficient R in hours (kept fixed).
+    :return: dict with CN, tc, nse, peak_error, volume_error, peak_time_error and evaluations.
+    """
+    times = np.asarray(times, dtype=float)
+    observed = np.asarray(observed, dtype=float)
+    d = d or DEFAULT_D
+    tc_range = tc_range or (TC_FACTORS[0] * tc, TC_FACTORS[1] * tc)
+    model = dict(area=area, P3_10=P3_10, return_period=return_period, I_min=I_min, d=d, method=method, storage=storage)
+
+    # Coarse grid, vectorized over CN
+    cn_values = np.linspace(*cn_range, grid_size)
+    tc_values = np.geomspace(*tc_range, grid_size)
+    nse = evaluate_grid(times, observed, cn_values, tc_values, **model)
+    i_tc, i_cn = np.unravel_index(np.nanargmax(nse), nse.shape)
+
+    # Refinement around the best grid point
+    def objective(x):
+        simulated = simulate_hydrographs([x[0]], x[1], times, **model)
+        value = 1 - fit_metrics(simulated, observed, times)["nse"][0]
+        return value if np.isfinite(value) else np.inf
+
+    x0 = np.array([cn_values[i_cn], tc_values[i_tc]])
+    steps = np.array([cn_values[1] - cn_values[0], tc_values[min(i_tc + 1, grid_size - 1)] - tc_values[max(i_tc - 1, 0)]])
+    bounds = ([cn_range[0], tc_range[0]], [cn_range[1], tc_range[1]])
+    best, _, evaluations = nelder_mead(objective, x0, steps, bounds)
+
+    simulated = simulate_hydrographs([best[0]], best[1], times, **model)
+    metrics = {key: float(value[0]) for key, value in fit_metrics(simulated, observed, times).items()}
+    return {"CN": float(best[0]), "tc": float(best[1]), **metrics,
+            "evaluations": int(nse.size + evaluations)}
+
+
+def calibrate_basins(basins, base_dir=None):
+    """
+    Calibrates every basin of a list of dicts (see the module docstring for the keys).
+    :param basins: List of basin dicts, or path to a JSON file with that list.
+    :param base_dir: Directory used to resolve relative reference paths (the JSON file folder by default).
+    :return: List of result dicts (basin name + calibrate_basin output).
+    """
+    if isinstance(basins, str):
+        base_dir = base_dir or os.path.dirname(os.path.abspath(basins))
+        with open(basins, "r", encoding="utf-8") as f:
+            basins = json.load(f)
+    base_dir = base_dir or os.getcwd()
+
+    results = []
+    for basin in basins:
+        reference = os.path.join(base_dir, basin["reference"])
+        times, observed = load_reference_hydrograph(reference, basin.get("reader", "csv"))
+        result = calibrate_basin(times, observed, basin["area"], basin["P3_10"], basin["return_period"],
+                                 basin["I_min"], basin["tc"], d=basin.get("d"),
+                                 cn_range=tuple(basin.get("cn_range", CN_RANGE)),
+                                 tc_range=tuple(basin["tc_range"]) if "tc_range" in basin else None,
+                                 method=basin.get("unit_hydrograph", "nrcs"), storage=basin.get("R"))
+        results.append({"name": basin.get("name", os.path.basename(reference)), **result})
+    return results
@@ -0,0 +1,407 @@
+"""
+Command-line entry point for the hydraulics scripts.
+
+Usage:
+    python cli.py nrcs --length 2.068 --area 1.21 --h-max 17.5 --h-min 1 --p3-10 83 --tr 100 --cn 79 --i-min 1.2 [-o hydrograph.csv] [--store DIR --basin NAME]
+    python cli.py hms2tikz FILE [FILE ...] -o figure.tex [--reader csv|hms] [--time-min 0.5] [--time-max 3.5] [--plot] [--workers 4]
+    python cli.py dss-extract FILE.dss [FILE.dss ...] [--pathname /A/B/C/D/E/F/] -o series.csv
+    python cli.py stats FILE [FILE ...] [--reader csv|hms|dss] [-o statistics.csv]
+    python cli.py calibrate basins.json [-o calibration.csv]
+    python cli.py critical-duration --tc 0.8 --area 1.21 --p3-10 83 --tr 100 --cn 79 --i-min 1.2 [--d 0.0833 0.0333] [--uh clark --storage 0.5] [--storm uniform]
+    python cli.py report figures.json [--force]
+    python cli.py rainfall record.csv [--durations 0.5 1 3 24] [--tr 2 10 100] [-o design_rainfall.csv]
+    python cli.py serve [--port 8765] [--workers 4]
+    python cli.py pond hydrograph.csv --bottom-area 5000 10000 --depth 3 --orifice 0.4 0.6 [--weir-length 10] [-o ponds.csv]
+    python cli.py compare REFERENCE SIMULATED [--dt 0.0333] [--workers 4] [--pathname /A/B/C/D/E/F/] [-o comparison.csv]
+
+Heavy modules (pandas, matplotlib, hecdss) are only imported by the subcommand
+that needs them, so `--help` and `nrcs` start with numpy as the only third-party import.
+Use --trace FILE to write the stage timings of the run (see HMS_2_hydrogram/instrumentation.py).
+"""
+import argparse
+import csv
+import os
+import sys
+
+import hms_path  # noqa: F401
+import instrumentation
+
+
+def open_output(file_path):
+    """Opens `file_path` for writing, or stdout when it is "-"."""
+    if file_path == "-":
+        return open(sys.stdout.fileno(), "w", encoding="utf-8", newline="", closefd=False)
+    return open(file_path, "w", encoding="utf-8", newline="")
+
+
+# ==========================
+# SUBCOMMANDS
+# ==========================
+def basin_tc(args):
+    """--tc, or the Kirpich tc (plus --to) of the channel given by --length, --h-max and --h-min."""
+    if args.tc is not None:
+        return args.tc
+    from concentration_time import calculate_tc_kirpich
+    slope = (args.h_max - args.h_min) / 1000 / args.length  # Pendiente del cauce en m/m
+    return calculate_tc_kirpich(args.length, slope) + args.to
+
+
+def run_nrcs(args):
+    from NRCS import generate_precipitation_nrcs, generate_unit_hydrograph, convolve_hydrograph
+    from results import Hydrograph
+
+    tc = basin_tc(args)
+    d = args.d if args.d is not None else tc / 7
+
+    with instrumentation.span("compute.nrcs.precipitation") as s:
+        precipitation_nrcs = generate_precipitation_nrcs(tc, args.p3_10, args.tr, args.area, args.cn, args.i_min, d,
+                                                         duration=args.duration)
+        s.rows = len(precipitation_nrcs)
+
+    with instrumentation.span("compute.nrcs.unit_hydrograph") as s:
+        time_steps, unit_hydrograph = generate_unit_hydrograph(tc, args.area, args.uh, args.storage)
+        s.rows = len(time_steps)
+    with instrumentation.span("compute.nrcs.convolution") as s:
+        flow = convolve_hydrograph(unit_hydrograph, precipitation_nrcs.effective)
+        hydrograph = Hydrograph(time_steps[:len(flow)], flow)
+        s.rows = len(hydrograph)
+
+    with instrumentation.span("output.csv"):
+        if args.hyetograph:
+            with open_output(args.hyetograph) as f:
+                writer = csv.writer(f)
+                writer.writerow(precipitation_nrcs.labels())
+                writer.writerows(precipitation_nrcs.data.T.tolist())
+        with open_output(args.output) as f:
+            writer = csv.writer(f)
+            writer.writerow(hydrograph.labels())
+            writer.writerows(hydrograph.data.T.tolist())
+
+    if args.store:
+        from results_store import ResultsStore
+        with instrumentation.span("output.store"):
+            store = ResultsStore(args.store, compress=args.compress)
+            scenario = dict(basin=args.basin, return_period=args.tr, CN=args.cn, tc=tc, d=d)
+            store.append(precipitation_nrcs, **scenario)
+            store.append(hydrograph, **scenario)
+
+    print(f"tc = {tc:.3f} h, d = {d:.4f} h, Qmax = {hydrograph.peak[1]:.2f} m³/s", file=sys.stderr)
+
+
+def run_hms2tikz(args):
+    from pipeline import build_report
+    if args.reader == "hms":
+        from data_reader import load_data as loader
+    else:
+        from data_reader_csv import load_csv_data as loader
+
+    build_report(args.inputs, loader, args.output, time_min=args.time_min, time_max=args.time_max,
+                 num_points=args.num_points, marker_density=args.marker_density,
+                 label_max_point=not args.no_label_max, wrap=not args.no_wrap, plot=args.plot,
+                 stats_file=args.stats, stats_threshold=args.stats_threshold,
+                 workers=args.workers, processes=not args.threads)
+
+
+def run_dss_extract(args):
+    from data_reader_dss import load_dss_data
+
+    df = load_dss_data(args.inputs, pathname=args.pathname, catalog_file=args.catalog)
+    with instrumentation.span("output.csv") as s:
+        with open_output(args.output) as f:
+            df.to_csv(f, index=False)
+        s.rows = len(df)
+
+
+def run_stats(args):
+    import hydrograph_stats
+
+    if args.reader == "dss":
+        from data_reader_dss import load_dss_data
+        df = load_dss_data(args.inputs, pathname=args.pathname, catalog_file=args.catalog)
+        table = hydrograph_stats.summarize_frame(df, threshold=args.threshold, base_flow=args.base_flow)
+    else:
+        if args.reader == "hms":
+            from data_reader import load_data as loader
+        else:
+            from data_reader_csv import load_csv_data as loader
+        table = hydrograph_stats.summarize_files(args.inputs, loader, threshold=args.threshold, base_flow=args.base_flow)
+    with open_output(args.output) as f:
+        table.to_csv(f, index=False)
+
+
+def run_calibrate(args):
+    from calibration import calibrate_basins
+
+    with instrumentation.span("compute.calibration") as s:
+        results = calibrate_basins(args.basins)
+        s.rows = len(results)
+    with open_output(args.output) as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]) if results else ["name"])
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def run_critical_duration(args):
+    """Writes the peak-duration curve; returns 1 when the maximum peak is at the edge of the sweep."""
+    import numpy as np
+    from critical_duration import critical_duration_sweep
+
+    tc = basin_tc(args)
+    durations = np.linspace(args.min_duration, args.max_duration, args.num_durations) \
+        if args.min_duration is not None and args.max_duration is not None else None
+    with instrumentation.span("compute.critical_duration") as s:
+        curve = critical_duration_sweep(tc, args.p3_10, args.tr, args.area, args.cn, args.i_min,
+                                        durations=durations, time_steps=args.d, method=args.uh, storage=args.storage,
+                                        storm=args.storm)
+        s.rows = len(curve)
+    with open_output(args.output) as f:
+        writer = csv.writer(f)
+        writer.writerow(curve.labels())
+        writer.writerows(curve.data.T.tolist())
+
+    duration, d, peak = curve.maximum
+    if not curve.bracketed:
+        print(f"tc = {tc:.3f} h: the maximum peak ({peak:.2f} m³/s) is at the edge of the swept durations "
+              f"(D = {duration:.3f} h, d = {d:.4f} h), so the critical duration lies outside the range. "
+              f"Extend --min-duration / --max-duration"
+              + (", or use --storm uniform (alternating storms grow with D)." if args.storm == "alternating" else "."),
+              file=sys.stderr)
+        return 1
+    print(f"tc = {tc:.3f} h, D(12 tc / 7) = {tc / 7 * 12:.3f} h, critical D = {duration:.3f} h "
+          f"(d = {d:.4f} h), Qmax = {peak:.2f} m³/s", file=sys.stderr)
+
+
+def run_rainfall(args):
+    from rainfall_frequency import design_rainfall, DEFAULT_DURATIONS, DEFAULT_RETURN_PERIODS
+
+    with instrumentation.span("compute.rainfall") as s:
+        result = design_rainfall(args.record, args.durations or DEFAULT_DURATIONS, args.tr or DEFAULT_RETURN_PERIODS,
+                                 dt=args.dt, min_coverage=args.min_coverage)
+        s.rows = len(result["years"])
+    with open_output(args.output) as f:
+        writer = csv.writer(f)
+        writer.writerow(["Duration (hours)"] + [f"Tr = {tr:g} (mm)" for tr in result["return_periods"]])
+        for duration, depths in zip(result["durations"], result["depths"]):
+            writer.writerow([duration] + depths.tolist())
+
+    print(f"{len(result['years'])} years ({result['years'][0]}-{result['years'][-1]}), "
+          f"P3_10 = {result['P3_10']:.1f} mm", file=sys.stderr)
+
+
+def run_report(args):
+    from report_build import build_figures
+
+    results = build_figures(args.figures, manifest_file=args.manifest, force=args.force, workers=args.workers)
+    for output, status in results:
+        print(f"{status:>13}  {output}", file=sys.stderr)
+
+
+def run_pond(args):
+    import numpy as np
+    from detention_pond import regular_inflow, sizing_sweep
+    from hydrograph_comparison import load_hydrograph
+
+    hydrographs = [load_hydrograph(path, args.reader) for path in args.inputs]
+    duration = args.duration or 3 * max(times[-1] for times, _ in hydrographs)
+    dt = args.dt or min(float(np.median(np.diff(times))) for times, _ in hydrographs)
+    inflows = np.array([regular_inflow(times, flows, dt, duration)[1] for times, flows in hydrographs])
+    labels = [os.path.splitext(os.path.basename(path))[0] for path in args.inputs]
+
+    with instrumentation.span("compute.pond_routing") as s:
+        rows = sizing_sweep(inflows, dt, args.bottom_area, args.depth, args.side_slope, args.orifice,
+                            args.weir_length, args.weir_crest, labels=labels)
+        s.rows = len(rows)
+    with open_output(args.output) as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_serve(args):
+    import service
+
+    service.main(args.host, args.port, workers=args.workers, batch_window=args.batch_window,
+                 cache_size=args.cache_size)
+
+
+def run_compare(args):
+    from hydrograph_comparison import compare_directories
+
+    with instrumentation.span("compute.comparison") as s:
+        try:
+            rows = compare_directories(args.reference, args.simulated, dt=args.dt, workers=args.workers,
+                                       readers=(args.reference_reader, args.simulated_reader),
+                                       pathname=args.pathname)
+        except ValueError as e:
+            print(f"compare: {e}", file=sys.stderr)
+            return 1
+        s.rows = len(rows)
+    with open_output(args.output) as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def add_basin_arguments(parser):
+    parser.add_argument("--length", type=float, help="Longitud del cauce (km).")
+    parser.add_argument("--h-max", type=float, help="Altura máxima en la cuenca (m).")
+    parser.add_argument("--h-min", type=float, help="Altura mínima en la cuenca (m).")
+    parser.add_argument("--tc", type=float, default=None, help="Tiempo de concentración (h); replaces Kirpich.")
+    parser.add_argument("--to", type=float, default=0.0, help="Tiempo de entrada added to Kirpich tc (h).")
+    parser.add_argument("--area", type=float, required=True, help="Área de la cuenca (km²).")
+    parser.add_argument("--p3-10", type=float, required=True, help="Precipitación máxima en 3 h, Tr = 10 años (mm).")
+    parser.add_argument("--tr", type=float, required=True, help="Periodo de retorno (años).")
+    parser.add_argument("--cn", type=float, required=True, help="Número de curva.")
+    parser.add_argument("--i-min", type=float, required=True, help="Infiltración mínima (mm/h).")
+    parser.add_argument("--uh", choices=["nrcs", "clark"], default="nrcs", help="Unit hydrograph method.")
+    parser.add_argument("--storage", type=float, default=None, help="Clark storage coefficient R (h).")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", metavar="FILE", help="Enable instrumentation and write the JSON run summary to FILE.")
+    parser.add_argument("--log-level", default=None, help="Verbosity of the pipeline events (DEBUG, INFO, WARNING...).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    nrcs = subparsers.add_parser("nrcs", help="NRCS design hydrograph of one basin.")
+    add_basin_arguments(nrcs)
+    nrcs.add_argument("--d", type=float, default=None, help="Intervalo del hietograma (h); defaults to tc / 7.")
+    nrcs.add_argument("--duration", type=float, default=None, help="Storm duration (h); defaults to 12 * tc / 7.")
+    nrcs.add_argument("--hyetograph", metavar="FILE", help="Also write the hyetograph table to FILE.")
+    nrcs.add_argument("-o", "--output", default="-", help="Hydrograph CSV (default: stdout).")
+    nrcs.add_argument("--store", metavar="DIR", help="Also append the hyetograph and hydrograph to a results store.")
+    nrcs.add_argument("--basin", default=None, help="Basin name recorded in the results store.")
+    nrcs.add_argument("--compress", action="store_true", help="Store zlib-compressed blocks.")
+    nrcs.set_defaults(func=run_nrcs)
+
+    tikz = subparsers.add_parser("hms2tikz", help="TikZ figure from HMS hydrograph exports.")
+    tikz.add_argument("inputs", nargs="+")
+    tikz.add_argument("-o", "--output", required=True)
+    tikz.add_argument("--reader", choices=["csv", "hms"], default="csv",
+                      help="csv: Date,Time,Total Flow (load_csv_data); hms: inflow/outflow export (load_data).")
+    tikz.add_argument("--time-min", type=float, default=None)
+    tikz.add_argument("--time-max", type=float, default=None)
+    tikz.add_argument("--num-points", type=int, default=150)
+    tikz.add_argument("--marker-density", type=float, default=0.30)
+    tikz.add_argument("--no-label-max", action="store_true")
+    tikz.add_argument("--no-wrap", action="store_true")
+    tikz.add_argument("--plot", action="store_true", help="Also show the Matplotlib figure.")
+    tikz.add_argument("--stats", metavar="FILE", default=None, help="Also write the hydrograph statistics table.")
+    tikz.add_argument("--stats-threshold", type=float, default=0.0, help="Flow for the time above threshold (m³/s).")
+    tikz.add_argument("--workers", type=int, default=1, help="Parse the inputs concurrently with N workers.")
+    tikz.add_argument("--threads", action="store_true",
+                      help="Use worker threads instead of processes (the readers hold the GIL while parsing, "
+                           "so threads only overlap the file reads and the output).")
+    tikz.set_defaults(func=run_hms2tikz)
+
+    dss = subparsers.add_parser("dss-extract", help="Export one DSS time series to CSV.")
+    dss.add_argument("inputs", nargs="+")
+    dss.add_argument("--pathname", default=None, help="DSS pathname; if omitted it is selected from --catalog.")
+    dss.add_argument("--catalog", default=None, help="Catalog file used for the interactive selection.")
+    dss.add_argument("-o", "--output", default="-")
+    dss.set_defaults(func=run_dss_extract)
+
+    stats = subparsers.add_parser("stats", help="Peak, volume and timing statistics of many hydrographs.")
+    stats.add_argument("inputs", nargs="+")
+    stats.add_argument("--reader", choices=["csv", "hms", "dss"], default="csv")
+    stats.add_argument("--pathname", default=None, help="DSS pathname (dss reader).")
+    stats.add_argument("--catalog", default=None, help="DSS catalog for the interactive selection (dss reader).")
+    stats.add_argument("--threshold", type=float, default=0.0, help="Flow for the time above threshold (m³/s).")
+    stats.add_argument("--base-flow", type=float, default=0.0, help="Flow above which there is runoff (m³/s).")
+    stats.add_argument("-o", "--output", default="-")
+    stats.set_defaults(func=run_stats)
+
+    calibrate = subparsers.add_parser("calibrate", help="Fit CN and tc to HEC-HMS reference hydrographs.")
+    calibrate.add_argument("basins", help="JSON list of basins (see calibration.py).")
+    calibrate.add_argument("-o", "--output", default="-")
+    calibrate.set_defaults(func=run_calibrate)
+
+    critical = subparsers.add_parser("critical-duration", help="Storm duration giving the maximum peak flow.")
+    add_basin_arguments(critical)
+    critical.add_argument("--d", type=float, nargs="+", default=None, help="Hyetograph intervals (h); defaults to tc / 7.")
+    critical.add_argument("--min-duration", type=float, default=None, help="Shortest storm (h).")
+    critical.add_argument("--max-duration", type=float, default=None, help="Longest storm (h).")
+    critical.add_argument("--num-durations", type=int, default=200)
+    critical.add_argument("--storm", choices=["alternating", "uniform"], default="alternating",
+                          help="Design storm: alternating blocks (as nrcs) or constant intensity.")
+    critical.add_argument("-o", "--output", default="-", help="Peak-duration curve CSV (default: stdout).")
+    critical.set_defaults(func=run_critical_duration)
+
+    rainfall = subparsers.add_parser("rainfall", help="Design rainfall P(d, Tr) and P3_10 from a rain-gauge record.")
+    rainfall.add_argument("record", help="CSV with a timestamp and a depth (mm) per interval.")
+    rainfall.add_argument("--durations", type=float, nargs="+", default=None, help="Durations (h).")
+    rainfall.add_argument("--tr", type=float, nargs="+", default=None, help="Return periods (years).")
+    rainfall.add_argument("--dt", type=float, default=None, help="Record interval (h); detected when omitted.")
+    rainfall.add_argument("--min-coverage", type=float, default=0.8, help="Minimum fraction of valid data per year.")
+    rainfall.add_argument("-o", "--output", default="-")
+    rainfall.set_defaults(func=run_rainfall)
+
+    report = subparsers.add_parser("report", help="Rebuild only the stale figures of a report.")
+    report.add_argument("figures", help="JSON list of figures (see HMS_2_hydrogram/report_build.py).")
+    report.add_argument("--manifest", default=None, help="Build manifest (default: .hydrograph_build.json next to figures).")
+    report.add_argument("--force", action="store_true", help="Rebuild every figure.")
+    report.add_argument("--workers", type=int, default=1, help="Parsing workers of every rebuild.")
+    report.set_defaults(func=run_report)
+
+    pond = subparsers.add_parser("pond", help="Detention pond sizing sweep (Modified Puls routing).")
+    pond.add_argument("inputs", nargs="+", help="Inflow hydrographs (any reader of hydrograph_comparison).")
+    pond.add_argument("--reader", choices=["auto", "nrcs", "csv", "hms", "dss"], default="auto")
+    pond.add_argument("--bottom-area", type=float, nargs="+", required=True, help="Bottom areas (m²).")
+    pond.add_argument("--depth", type=float, nargs="+", required=True, help="Maximum depths (m).")
+    pond.add_argument("--side-slope", type=float, nargs="+", default=[2.0], help="Wall slopes (H:V).")
+    pond.add_argument("--orifice", type=float, nargs="+", default=[0.3], help="Orifice diameters (m).")
+    pond.add_argument("--weir-length", type=float, nargs="+", default=[0.0], help="Emergency weir lengths (m).")
+    pond.add_argument("--weir-crest", type=float, nargs="+", default=None, help="Weir crest heights (m); 80 %% of depth by default.")
+    pond.add_argument("--dt", type=float, default=None, help="Routing step (h); defaults to the finest input step.")
+    pond.add_argument("--duration", type=float, default=None, help="Routing duration (h); defaults to 3 x the inflow.")
+    pond.add_argument("-o", "--output", default="-")
+    pond.set_defaults(func=run_pond)
+
+    serve = subparsers.add_parser("serve", help="Local JSON service for the NRCS pipeline (see service.py).")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    serve.add_argument("--batch-window", type=float, default=0.005, help="Seconds a batch waits for more requests.")
+    serve.add_argument("--cache-size", type=int, default=1024, help="Responses kept in the LRU cache.")
+    serve.set_defaults(func=run_serve)
+
+    readers = ["auto", "nrcs", "csv", "hms", "dss"]
+    compare = subparsers.add_parser("compare", help="Compare hydrographs of different sources on a common time axis.")
+    compare.add_argument("reference", help="Reference file, or directory of files paired by name.")
+    compare.add_argument("simulated", help="Simulated file, or directory of files paired by name.")
+    compare.add_argument("--reference-reader", choices=readers, default="auto")
+    compare.add_argument("--simulated-reader", choices=readers, default="auto")
+    compare.add_argument("--pathname", default=None, help="DSS pathname (required for dss sources).")
+    compare.add_argument("--dt", type=float, default=None, help="Step of the common axis (h); defaults to the finest step.")
+    compare.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    compare.add_argument("-o", "--output", default="-")
+    compare.set_defaults(func=run_compare)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    instrumentation.configure_logging(args.log_level)
+    if args.trace:
+        instrumentation.enable()
+
+    if args.command in ("nrcs", "critical-duration") and args.tc is None and None in (args.length, args.h_max, args.h_min):
+        print("nrcs: either --tc or --length, --h-max and --h-min are required.", file=sys.stderr)
+        return 2
+    if args.command in ("nrcs", "critical-duration") and args.uh == "clark" and args.storage is None:
+        print("nrcs: --uh clark requires --storage.", file=sys.stderr)
+        return 2
+
+    with instrumentation.span(args.command):
+        status = args.func(args)
+
+    if args.trace:
+        instrumentation.write_summary(args.trace)
+        instrumentation.write_collapsed(os.path.splitext(args.trace)[0] + ".folded")
+    return status or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
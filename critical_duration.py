@@ -0,0 +1,125 @@
+"""
+Critical storm duration: the design storm duration that maximizes the peak discharge.
+
+generate_precipitation_nrcs fixes the storm duration at D = 12 * tc / 7. This module
+builds the design storms of a whole range of durations (and, optionally, of several time
+steps d) and computes their excess rainfall and hydrographs together:
+- the cumulative depth-duration curve P(t, Tr) is evaluated once per time step, on the
+  grid of the longest duration, and every shorter storm reuses it;
+- hyetographs are stacked in a (durations x intervals) array, so losses and the
+  convolution with the unit hydrograph run once for all of them.
+
+The hydrographs are those of `cli.py nrcs` and the scripts (convolve_hydrograph with the
+100-point unit hydrograph of generate_unit_hydrograph), so the peak of a duration equal to
+12 * tc / 7 is the Qmax printed by `cli.py nrcs`; the hydrograph is not cut at 100 samples.
+
+Storms:
+- "alternating" (the storm of the scripts): every storm is built from the same
+  depth-duration curve, so a longer storm only adds rain around the same central blocks
+  and the peak keeps growing with the duration. The maximum then sits at the longest
+  duration of the sweep and is not a critical duration.
+- "uniform": constant intensity P(D, Tr) / D over the whole storm. Longer storms are less
+  intense, so the peak has a real maximum (around the duration where the whole basin
+  contributes).
+A maximum at the shortest or longest duration of the sweep only says that the critical
+duration lies outside the range: PeakDurationCurve.critical raises ValueError in that case.
+"""
+import numpy as np
+from NRCS import (design_depth_curve, alternating_block_positions, correct_precipitation_infiltration,
+                  generate_unit_hydrograph, convolve_hydrograph_batch)
+from results import PeakDurationCurve
+
+STORMS = ("alternating", "uniform")
+
+DURATION_FACTORS = (0.25, 4.0)  # Default sweep, relative to 12 * tc / 7
+NUM_DURATIONS = 200
+
+
+def alternating_hyetographs(increments, intervals):
+    """
+    Alternating block hyetographs of several storm lengths built from the same increments.
+    :param increments: Depth increments of the longest storm (mm), in chronological order.
+    :param intervals: Array (k,) with the number of intervals of every storm.
+    :return: Array (k, max(intervals)); row j holds the storm of intervals[j] blocks, zero-padded.
+    """
+    intervals = np.asarray(intervals, dtype=int)
+    width = intervals.max()
+    valid = np.arange(width) < intervals[:, np.newaxis]
+
+    # Increments of every storm sorted in descending order (padding sorts last)
+    sorted_increments = np.sort(np.where(valid, increments[:width], -np.inf), axis=1)[:, ::-1]
+    positions = alternating_block_positions(intervals)
+
+    hyetographs = np.zeros((len(intervals), width))
+    rows = np.broadcast_to(np.arange(len(intervals))[:, np.newaxis], valid.shape)
+    hyetographs[rows[valid], positions[valid]] = sorted_increments[valid]
+    return hyetographs
+
+
+def uniform_hyetographs(cumulative, intervals):
+    """
+    Constant intensity hyetographs of several storm lengths.
+    :param cumulative: Cumulative depth (mm) at the end of every interval of the longest storm.
+    :param intervals: Array (k,) with the number of intervals of every storm.
+    :return: Array (k, max(intervals)); row j spreads the depth of intervals[j] intervals evenly, zero-padded.
+    """
+    intervals = np.asarray(intervals, dtype=int)
+    depths = cumulative[intervals - 1] / intervals
+    return np.where(np.arange(intervals.max()) < intervals[:, np.newaxis], depths[:, np.newaxis], 0.0)
+
+
+def critical_duration_sweep(tc, P3_10, return_period, area, NC, I_min, durations=None, time_steps=None,
+                            method="nrcs", storage=None, storm="alternating"):
+    """
+    Peak discharge of the NRCS design storm for many durations and time steps.
+    :param tc: Time of concentration in hours.
+    :param P3_10: Maximum precipitation in 3 hours with a 10-year return period.
+    :param return_period: Return period in years.
+    :param area: Basin area in km².
+    :param NC: Curve number.
+    :param I_min: Minimum infiltration rate in mm/h.
+    :param durations: Storm durations in hours (defaults to NUM_DURATIONS values over
+                      DURATION_FACTORS * 12 * tc / 7).
+    :param time_steps: Hyetograph intervals d in hours (defaults to tc / 7).
+    :param method: Unit hydrograph, "nrcs" or "clark" (see NRCS.generate_unit_hydrograph).
+    :param storage: Clark storage coefficient R in hours.
+    :param storm: "alternating" (as the scripts) or "uniform" (see the module docstring).
+    :return: PeakDurationCurve with one row per (time step, duration); `.critical` gives
+             the duration, time step and peak of the critical storm (ValueError when the
+             maximum is at the edge of the duration range).
+    """
+    if storm not in STORMS:
+        raise ValueError(f"Unknown storm: {storm}")
+    D = tc / 7 * 12
+    if durations is None:
+        durations = np.linspace(DURATION_FACTORS[0] * D, DURATION_FACTORS[1] * D, NUM_DURATIONS)
+    durations = np.asarray(durations, dtype=float)
+    time_steps = np.atleast_1d(tc / 7 if time_steps is None else np.asarray(time_steps, dtype=float))
+    uh_time, unit_hydrograph = generate_unit_hydrograph(tc, area, method, storage)
+    uh_step = uh_time[1] - uh_time[0]  # Sample i of the hydrograph is at time i * uh_step (as in cli.py nrcs)
+
+    blocks = []
+    for d in time_steps:
+        intervals = np.maximum(np.ceil(durations / d).astype(int), 1)
+
+        # Depth-duration curve of the longest storm, shared by every duration
+        t = (np.arange(intervals.max()) + 1) * d
+        cumulative = design_depth_curve(P3_10, return_period, area, t)
+
+        if storm == "uniform":
+            hyetographs = uniform_hyetographs(cumulative, intervals)
+        else:
+            hyetographs = alternating_hyetographs(np.diff(cumulative, prepend=0), intervals)
+        effective = correct_precipitation_infiltration(hyetographs, NC, d, I_min)
+        effective[np.arange(hyetographs.shape[1]) >= intervals[:, np.newaxis]] = 0  # No rain after the storm
+
+        flows = convolve_hydrograph_batch(effective, unit_hydrograph)
+
+        block = np.empty((4, len(durations)))
+        block[0] = durations
+        block[1] = d
+        block[2] = flows.max(axis=1)
+        block[3] = np.argmax(flows, axis=1) * uh_step
+        blocks.append(block)
+
+    return PeakDurationCurve.from_block(np.concatenate(blocks, axis=1))
@@ -0,0 +1,17 @@
+"""
+Makes the HMS_2_hydrogram modules importable from the repository root.
+
+The HMS_2_hydrogram scripts import their siblings by bare name (they are run from
+that folder), so root-level tools import this module before using them:
+
+    import hms_path  # noqa: F401
+    from data_reader_csv import load_csv_data
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+HMS_DIR = os.path.join(ROOT_DIR, "HMS_2_hydrogram")
+
+if HMS_DIR not in sys.path:
+    sys.path.insert(0, HMS_DIR)
@@ -0,0 +1,213 @@
+"""
+Aligned comparison of hydrographs coming from different sources: NRCS script outputs
+(convolve_hydrograph / `cli.py nrcs`), HEC-HMS CSV exports (load_csv_data, load_data)
+and DSS series (load_dss_data).
+
+Every source has its own time axis (a 100-point linspace, 2-minute HMS steps, DSS
+timestamps). The series are resampled with vectorized linear interpolation onto one
+common axis and compared there: peak, volume and timing differences plus goodness of
+fit (NSE, RMSE, KGE, correlation). Whole directories of basin pairs are compared in
+a process pool and summarized in one report.
+
+Usage:
+    python cli.py compare REFERENCE SIMULATED [-o report.csv] [--dt 0.0333] [--workers 4]
+
+where REFERENCE and SIMULATED are two files, or two directories whose files are paired
+by name (e.g. HMS exports vs NRCS outputs of the same basins); files without a counterpart
+are reported with a warning. DSS sources need --pathname (the workers cannot prompt for one).
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from calibration import fit_metrics
+
+import hms_path  # noqa: F401
+from instrumentation import get_logger, log_event
+
+logger = get_logger("comparison")
+
+HYDROGRAPH_EXTENSIONS = (".csv", ".dss")
+
+
+def load_hydrograph(file_path, reader="auto", pathname=None):
+    """
+    Reads one hydrograph from any of the supported sources.
+    :param file_path: Path to the file.
+    :param reader: "nrcs" (CSV written by `cli.py nrcs`), "csv" (load_csv_data), "hms" (load_data),
+                   "dss" (load_dss_data) or "auto" (by extension and header).
+    :param pathname: DSS pathname (dss reader).
+    :return: (times in hours, flows in m³/s) arrays.
+    """
+    if reader == "auto":
+        reader = detect_reader(file_path)
+    if reader == "nrcs":
+        data = np.loadtxt(file_path, delimiter=",", skiprows=1, usecols=(0, 1), ndmin=2)
+        return data[:, 0], data[:, 1]
+
+    if reader == "dss":
+        from data_reader_dss import load_dss_data
+        df = load_dss_data([file_path], pathname=pathname)
+    elif reader == "hms":
+        from data_reader import load_data
+        df = load_data(file_path)
+    else:
+        from data_reader_csv import load_csv_data
+        df = load_csv_data(file_path)
+    # The readers return elapsed hours (load_csv_data unwraps the midnight rollover of HMS exports)
+    return df["Time_h"].to_numpy(dtype=float), df["Q_outflow"].to_numpy(dtype=float)
+
+
+def detect_reader(file_path):
+    """Guesses the reader of a file from its extension and header line."""
+    if file_path.lower().endswith(".dss"):
+        return "dss"
+    with open(file_path, "r", encoding="utf-8") as f:
+        header = f.readline()
+    if header.startswith("Time (hours)"):
+        return "nrcs"
+    if "Total Flow" in header:
+        return "csv"
+    return "hms"
+
+
+def common_time_axis(times_list, dt=None):
+    """
+    Time axis covering every series.
+    :param times_list: List of time arrays (h).
+    :param dt: Step of the axis (h); defaults to the finest median step of the series.
+    :return: Array of times from the earliest start to the latest end.
+    """
+    start = min(t[0] for t in times_list)
+    end = max(t[-1] for t in times_list)
+    if dt is None:
+        dt = min(np.median(np.diff(t)) for t in times_list if len(t) > 1)
+    return start + np.arange(int(np.floor((end - start) / dt + 1e-9)) + 1) * dt
+
+
+def resample_series(times_list, flows_list, axis):
+    """
+    Interpolates every series onto `axis` (zero flow outside each series).
+    :return: Array (series, len(axis)).
+    """
+    resampled = np.empty((len(flows_list), len(axis)))
+    for row, times, flows in zip(resampled, times_list, flows_list):
+        row[:] = np.interp(axis, times, flows, left=0.0, right=0.0)
+    return resampled
+
+
+def comparison_metrics(simulated, observed, times):
+    """
+    Differences and goodness of fit of one or many simulated hydrographs against a reference
+    sampled on the same axis.
+    :param simulated: Array (..., n).
+    :param observed: Array (n,).
+    :param times: Array (n,) of times (h).
+    :return: dict of arrays (see fit_metrics) plus peak_diff and volume_diff (absolute), rmse, r and kge.
+    """
+    simulated = np.asarray(simulated, dtype=float)
+    observed = np.asarray(observed, dtype=float)
+    dt = np.diff(times)
+    volume_obs = np.sum((observed[1:] + observed[:-1]) * dt) / 2 * 3600
+    volume_sim = np.sum((simulated[..., 1:] + simulated[..., :-1]) * dt, axis=-1) / 2 * 3600
+    sim_mean = simulated.mean(axis=-1)
+    sim_std = simulated.std(axis=-1)
+    obs_std = observed.std()
+    covariance = np.mean((simulated - sim_mean[..., np.newaxis]) * (observed - observed.mean()), axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):  # Empty or constant series give NaN/inf metrics
+        metrics = fit_metrics(simulated, observed, times)
+        r = covariance / (sim_std * obs_std)
+        kge = 1 - np.sqrt((r - 1) ** 2 + (sim_std / obs_std - 1) ** 2 + (sim_mean / observed.mean() - 1) ** 2)
+
+    metrics.update({
+        "peak_diff": simulated.max(axis=-1) - observed.max(),
+        "volume_diff": volume_sim - volume_obs,
+        "rmse": np.sqrt(np.mean((simulated - observed) ** 2, axis=-1)),
+        "r": r,
+        "kge": kge,
+    })
+    return metrics
+
+
+def compare_hydrographs(reference, simulated, dt=None):
+    """
+    Compares one or many simulated hydrographs against a reference on a common axis.
+    :param reference: (times, flows) of the reference.
+    :param simulated: (times, flows) of one simulation, or a list of them.
+    :param dt: Step of the common axis (h).
+    :return: List with one dict of metrics per simulated hydrograph.
+    """
+    if isinstance(simulated, tuple):
+        simulated = [simulated]
+    times_list = [np.asarray(reference[0], dtype=float)] + [np.asarray(t, dtype=float) for t, _ in simulated]
+    flows_list = [np.asarray(reference[1], dtype=float)] + [np.asarray(q, dtype=float) for _, q in simulated]
+    axis = common_time_axis(times_list, dt)
+    resampled = resample_series(times_list, flows_list, axis)
+    metrics = comparison_metrics(resampled[1:], resampled[0], axis)
+    return [{key: float(value[i]) for key, value in metrics.items()} for i in range(len(simulated))]
+
+
+def pair_files(reference_dir, simulated_dir):
+    """
+    Pairs the hydrograph files of two directories by file name (without extension, case-insensitive).
+    :return: (list of (name, reference path, simulated path) sorted by name,
+              sorted list of the paths of either directory without a counterpart).
+    """
+    def index(directory):
+        return {os.path.splitext(f)[0].lower(): os.path.join(directory, f)
+                for f in os.listdir(directory) if f.lower().endswith(HYDROGRAPH_EXTENSIONS)}
+
+    references = index(reference_dir)
+    simulations = index(simulated_dir)
+    pairs = [(name, references[name], simulations[name]) for name in sorted(references.keys() & simulations.keys())]
+    unmatched = sorted([path for name, path in references.items() if name not in simulations]
+                       + [path for name, path in simulations.items() if name not in references])
+    return pairs, unmatched
+
+
+def _compare_pair(task):
+    name, reference_path, simulated_path, dt, readers, pathname = task
+    reference = load_hydrograph(reference_path, readers[0], pathname)
+    simulated = load_hydrograph(simulated_path, readers[1], pathname)
+    return {"name": name, "reference": reference_path, "simulated": simulated_path,
+            **compare_hydrographs(reference, simulated, dt)[0]}
+
+
+def compare_directories(reference, simulated, dt=None, workers=None, readers=("auto", "auto"), pathname=None):
+    """
+    Compares every basin pair of two directories (or one pair of files).
+    :param reference: Reference directory or file (e.g. HEC-HMS exports).
+    :param simulated: Simulated directory or file (e.g. NRCS script outputs).
+    :param dt: Step of the common axis (h).
+    :param workers: Number of worker processes (1 runs in this process; None uses all cores).
+    :param readers: Readers of the reference and simulated files (see load_hydrograph).
+    :param pathname: DSS pathname for DSS sources (required if any file is read as DSS).
+    :return: List of report rows (name, file paths and comparison_metrics), one per pair.
+    :raises ValueError: If only one of reference and simulated is a directory, if no files pair up,
+                        or if a DSS source has no pathname.
+    """
+    if os.path.isdir(reference) != os.path.isdir(simulated):
+        raise ValueError(f"Reference and simulated must both be files or both be directories: "
+                         f"{reference}, {simulated}")
+    if os.path.isdir(reference):
+        pairs, unmatched = pair_files(reference, simulated)
+        for path in unmatched:
+            log_event(logging.WARNING, "compare.unmatched", f"No counterpart for {path}", logger, file=path)
+        if not pairs:
+            raise ValueError(f"No hydrograph file of {reference} has a counterpart of the same name in {simulated}.")
+    else:
+        pairs = [(os.path.splitext(os.path.basename(reference))[0], reference, simulated)]
+    if pathname is None:
+        dss = [path for _, *paths in pairs for path, reader in zip(paths, readers)
+               if reader == "dss" or (reader == "auto" and path.lower().endswith(".dss"))]
+        if dss:
+            raise ValueError(f"DSS sources need a pathname (--pathname): {', '.join(dss)}")
+    tasks = [(name, ref, sim, dt, readers, pathname) for name, ref, sim in pairs]
+
+    if workers == 1 or len(tasks) <= 1:
+        rows = [_compare_pair(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(_compare_pair, tasks))
+    return rows
@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 
 def transform_hyetogram(time_intervals, hyetogram, new_time_step):
     """
@@ -24,6 +23,7 @@ def transform_hyetogram(time_intervals, hyetogram, new_time_step):
     new_precipitation *= scale_factor
 
     # Crear un DataFrame para visualizar el nuevo hietograma
+    import pandas as pd
     transformed_hyetogram = pd.DataFrame({
         "Time (hours)": new_time_intervals,
         "Precipitation (mm)": new_precipitation
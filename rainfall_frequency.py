@@ -0,0 +1,194 @@
+"""
+Design rainfall from long rain-gauge records: P(d, Tr) and the P3_10 used by
+generate_precipitation_nrcs (maximum 3-hour depth with a 10-year return period).
+
+The record (CSV with a timestamp and a depth per interval, e.g. 5-minute data) is read in
+chunks and placed on a regular time grid (missing intervals are NaN). For every chunk the
+rolling depths of all durations are obtained as differences of one cumulative sum, and their
+annual maxima are reduced with np.maximum.reduceat over the year boundaries. The last
+samples of each chunk are carried over, so windows spanning two chunks are not lost.
+Years with too many missing intervals are discarded, and a Gumbel (EV1) distribution is
+fitted by moments to the annual maxima of every duration.
+
+Usage:
+    python cli.py rainfall record.csv [--durations 0.25 0.5 1 3 6 12 24] [--tr 2 5 10 25 50 100] [-o idf.csv]
+"""
+import numpy as np
+
+DEFAULT_DURATIONS = (5 / 60, 10 / 60, 15 / 60, 0.5, 0.75, 1, 1.5, 2, 3, 4, 6, 8, 12, 18, 24, 36, 48, 72)  # h
+DEFAULT_RETURN_PERIODS = (2, 5, 10, 25, 50, 100)  # years
+MIN_COVERAGE = 0.8  # Minimum fraction of valid intervals for a year to be used
+CHUNK_ROWS = 500_000
+EULER_GAMMA = 0.5772156649
+
+
+class AnnualMaxima:
+    """
+    Accumulates the annual maximum depths of several durations from consecutive chunks of a
+    regular record.
+
+    Example:
+        maxima = AnnualMaxima([1, 3, 24], dt=5 / 60)
+        for depths, years in chunks:   # arrays of the same length, one value per interval
+            maxima.update(depths, years)
+        years, table = maxima.result()   # table: (years, durations) in mm
+    """
+
+    def __init__(self, durations, dt):
+        """
+        :param durations: Durations in hours (multiples of dt are used, at least one interval).
+        :param dt: Interval of the record in hours.
+        """
+        self.durations = np.asarray(durations, dtype=float)
+        self.dt = dt
+        self.windows = np.maximum(np.round(self.durations / dt).astype(int), 1)
+        self.maxima = {}  # year -> array of maxima per duration
+        self.valid = {}  # year -> number of valid intervals
+        self._tail_depths = np.empty(0)
+        self._tail_years = np.empty(0, dtype=int)
+
+    def update(self, depths, years):
+        """
+        Adds the next chunk of the record.
+        :param depths: Depth per interval (mm); NaN for missing data.
+        :param years: Year of every interval.
+        """
+        depths = np.asarray(depths, dtype=float)
+        years = np.asarray(years, dtype=int)
+        for year, count in zip(*np.unique(years[~np.isnan(depths)], return_counts=True)):
+            self.valid[int(year)] = self.valid.get(int(year), 0) + int(count)
+
+        carry = len(self._tail_depths)
+        depths = np.concatenate([self._tail_depths, depths])
+        years = np.concatenate([self._tail_years, years])
+        cumulative = np.concatenate([[0.0], np.cumsum(np.nan_to_num(depths))])
+
+        for j, window in enumerate(self.windows):
+            # Windows ending in the new samples: end index from max(carry, window - 1)
+            first_end = max(carry, window - 1)
+            if first_end >= len(depths):
+                continue
+            ends = np.arange(first_end, len(depths))
+            sums = cumulative[ends + 1] - cumulative[ends + 1 - window]
+            end_years = years[first_end:]
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(end_years)) + 1])
+            for year, value in zip(end_years[starts], np.maximum.reduceat(sums, starts)):
+                row = self.maxima.setdefault(int(year), np.zeros(len(self.windows)))
+                row[j] = max(row[j], value)
+
+        # Chunks shorter than the longest window accumulate in the tail until it is full
+        keep = int(self.windows.max()) - 1
+        self._tail_depths = depths[max(len(depths) - keep, 0):] if keep else np.empty(0)
+        self._tail_years = years[max(len(years) - keep, 0):] if keep else np.empty(0, dtype=int)
+        return self
+
+    def result(self, min_coverage=MIN_COVERAGE):
+        """
+        Annual maxima of the years with enough valid data.
+        :param min_coverage: Minimum fraction of valid intervals of a full year.
+        :return: (years, array (years, durations) in mm).
+        """
+        years = []
+        for year in sorted(self.maxima):
+            days = 366 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 365
+            if self.valid.get(year, 0) >= min_coverage * days * 24 / self.dt:
+                years.append(year)
+        table = np.array([self.maxima[year] for year in years]).reshape(len(years), len(self.windows))
+        return np.array(years, dtype=int), table
+
+
+def read_record_chunks(file_path, dt=None, time_column=0, depth_column=1, chunk_rows=CHUNK_ROWS):
+    """
+    Streams a rainfall record as chunks of a regular grid.
+    :param file_path: CSV with a header, a timestamp column and a depth column (mm per interval).
+    :param dt: Interval in hours (when None, the most frequent step between the timestamps of the
+               first chunk, so gaps or repeated rows at the start of the record do not change it).
+    :param time_column, depth_column: Column positions.
+    :param chunk_rows: Rows read per chunk.
+    :return: (dt, generator of (depths, years) arrays); missing intervals are NaN.
+    """
+    import pandas as pd
+    reader = pd.read_csv(file_path, usecols=[time_column, depth_column], chunksize=chunk_rows)
+    first = next(reader)
+    times = pd.to_datetime(first.iloc[:, 0]).to_numpy(dtype="datetime64[s]")
+    if dt is None:
+        steps = np.diff(times)
+        steps = steps[steps > np.timedelta64(0, "s")]
+        if len(steps) == 0:
+            raise ValueError(f"Cannot detect the interval of {file_path}: no increasing timestamps in the first chunk.")
+        values, counts = np.unique(steps, return_counts=True)
+        dt = float(values[np.argmax(counts)] / np.timedelta64(1, "h"))
+    step = np.timedelta64(int(round(dt * 3600)), "s")
+    origin = times[0]
+
+    def chunks():
+        next_position = 0
+        for frame in _chain(first, reader):
+            t = pd.to_datetime(frame.iloc[:, 0]).to_numpy(dtype="datetime64[s]")
+            positions = (t - origin) // step
+            keep = positions >= next_position  # Ignore repeated or out-of-order rows
+            positions = positions[keep]
+            if len(positions) == 0:
+                continue
+            depths = np.full(positions[-1] - next_position + 1, np.nan)
+            depths[positions - next_position] = frame.iloc[:, 1].to_numpy(dtype=float)[keep]
+            grid = origin + (next_position + np.arange(len(depths))) * step
+            years = grid.astype("datetime64[Y]").astype(int) + 1970
+            next_position = positions[-1] + 1
+            yield depths, years
+
+    return dt, chunks()
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def fit_gumbel(annual_maxima):
+    """
+    Gumbel (EV1) parameters fitted by moments.
+    :param annual_maxima: Array (years, ...) of annual maxima.
+    :return: (location u, scale alpha) arrays of shape annual_maxima.shape[1:].
+    """
+    alpha = np.sqrt(6) * np.std(annual_maxima, axis=0, ddof=1) / np.pi
+    u = np.mean(annual_maxima, axis=0) - EULER_GAMMA * alpha
+    return u, alpha
+
+
+def gumbel_quantile(u, alpha, return_periods):
+    """
+    Depths of the given return periods.
+    :return: Array u.shape + (len(return_periods),).
+    """
+    reduced_variate = -np.log(-np.log(1 - 1 / np.asarray(return_periods, dtype=float)))
+    return np.asarray(u)[..., np.newaxis] + np.asarray(alpha)[..., np.newaxis] * reduced_variate
+
+
+def design_rainfall(file_path, durations=DEFAULT_DURATIONS, return_periods=DEFAULT_RETURN_PERIODS, dt=None,
+                    min_coverage=MIN_COVERAGE, **read_options):
+    """
+    Design rainfall depths of a rain-gauge record.
+    :param file_path: Record CSV (see read_record_chunks).
+    :param durations: Durations in hours (3 h is always added for P3_10).
+    :param return_periods: Return periods in years.
+    :param dt: Interval of the record in hours (detected when None).
+    :param min_coverage: Minimum fraction of valid intervals of a year.
+    :return: dict with "durations", "return_periods", "depths" (durations x return periods, mm),
+             "years", "annual_maxima" (years x durations, mm) and "P3_10" (mm).
+    """
+    durations = np.union1d(np.asarray(durations, dtype=float), [3.0])
+    dt, chunks = read_record_chunks(file_path, dt, **read_options)
+    maxima = AnnualMaxima(durations, dt)
+    for depths, years in chunks:
+        maxima.update(depths, years)
+    years, table = maxima.result(min_coverage)
+    if len(years) < 2:
+        raise ValueError(f"Not enough complete years in {file_path} ({len(years)}).")
+
+    u, alpha = fit_gumbel(table)
+    depths = gumbel_quantile(u, alpha, return_periods)
+    i_3h = int(np.argmin(np.abs(durations - 3.0)))
+    return {"durations": durations, "return_periods": np.asarray(return_periods, dtype=float), "depths": depths,
+            "years": years, "annual_maxima": table,
+            "P3_10": float(gumbel_quantile(u[i_3h], alpha[i_3h], [10])[0])}
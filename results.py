@@ -0,0 +1,168 @@
+"""
+Lightweight result objects of the NRCS pipeline.
+
+Each result keeps all its columns in one contiguous float64 block of shape
+(columns, samples). Columns are returned as zero-copy views, either as attributes
+(`result.effective`), by their table label (`result["Effective Precipitation (mm)"]`) or
+by position (`result[1]`, as in the (time, flow) tuples the generators used to return),
+and `to_pandas()` builds a DataFrame only when one is actually needed.
+"""
+import numpy as np
+
+
+class SeriesResult:
+    """Base class: a (columns x samples) float64 block with named column views."""
+    __slots__ = ("_data",)
+    COLUMNS = ()  # (attribute name, table label) of every row of the block
+
+    def __init__(self, *columns):
+        self._data = np.array(np.broadcast_arrays(*columns), dtype=np.float64, order="C", ndmin=2)
+        if self._data.shape[0] != len(self.COLUMNS):
+            raise ValueError(f"{type(self).__name__} expects {len(self.COLUMNS)} columns, got {self._data.shape[0]}.")
+
+    @classmethod
+    def from_block(cls, block):
+        """Wraps an existing (columns x samples) array without copying it when it is already float64 and contiguous."""
+        result = cls.__new__(cls)
+        result._data = np.ascontiguousarray(block, dtype=np.float64)
+        if result._data.ndim != 2 or result._data.shape[0] != len(cls.COLUMNS):
+            raise ValueError(f"{cls.__name__} expects a block of shape ({len(cls.COLUMNS)}, n).")
+        return result
+
+    @property
+    def data(self):
+        """The underlying (columns x samples) block."""
+        return self._data
+
+    @classmethod
+    def labels(cls):
+        return [label for _, label in cls.COLUMNS]
+
+    @classmethod
+    def column_index(cls, key):
+        """Row of the block holding the column given by position, attribute name or table label."""
+        if isinstance(key, (int, np.integer)) and not isinstance(key, bool):
+            if not -len(cls.COLUMNS) <= key < len(cls.COLUMNS):
+                raise IndexError(f"{cls.__name__} has {len(cls.COLUMNS)} columns, got index {key}.")
+            return int(key) % len(cls.COLUMNS)
+        for i, (name, label) in enumerate(cls.COLUMNS):
+            if key == name or key == label:
+                return i
+        raise KeyError(key)
+
+    def __getitem__(self, key):
+        return self._data[self.column_index(key)]
+
+    def __iter__(self):
+        # Allows `time, flow = result` unpacking
+        return iter(self._data)
+
+    def __len__(self):
+        return self._data.shape[1]
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self._data.dtype:
+            return self._data.copy() if copy else self._data
+        if copy is False:
+            raise ValueError(f"Cannot convert {type(self).__name__} to {np.dtype(dtype)} without copying.")
+        return self._data.astype(dtype)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(samples={len(self)}, columns={[name for name, _ in self.COLUMNS]})"
+
+    def to_pandas(self):
+        """Returns the result as a DataFrame with the table labels as column names."""
+        import pandas as pd
+        return pd.DataFrame({label: self._data[i] for i, (_, label) in enumerate(self.COLUMNS)})
+
+
+def _column(index, doc):
+    return property(lambda self: self._data[index], doc=doc)
+
+
+class PrecipitationResult(SeriesResult):
+    """Design hyetograph returned by generate_precipitation_nrcs."""
+    __slots__ = ()
+    COLUMNS = (
+        ("time", "Time (hours)"),
+        ("precipitation", "Precipitation (mm)"),
+        ("infiltration", "Infiltration (mm)"),
+        ("effective", "Effective Precipitation (mm)"),
+    )
+    time = _column(0, "End time of every interval (h).")
+    precipitation = _column(1, "Total precipitation per interval (mm).")
+    infiltration = _column(2, "Losses per interval (mm).")
+    effective = _column(3, "Effective precipitation per interval (mm).")
+
+
+class UnitHydrograph(SeriesResult):
+    """Unit hydrograph (flow for 1 mm of effective precipitation)."""
+    __slots__ = ()
+    COLUMNS = (
+        ("time", "Time (hours)"),
+        ("flow", "Flow (m3/s)"),
+    )
+    time = _column(0, "Time (h).")
+    flow = _column(1, "Flow per mm of effective precipitation (m³/s/mm).")
+
+
+class Hydrograph(SeriesResult):
+    """Routed (convolved) hydrograph."""
+    __slots__ = ()
+    COLUMNS = (
+        ("time", "Time (hours)"),
+        ("flow", "Flow (m3/s)"),
+    )
+    time = _column(0, "Time (h).")
+    flow = _column(1, "Flow (m³/s).")
+
+    @property
+    def peak(self):
+        """(time, flow) of the maximum flow."""
+        i = int(np.argmax(self._data[1]))
+        return float(self._data[0, i]), float(self._data[1, i])
+
+
+class PeakDurationCurve(SeriesResult):
+    """Peak discharge of the design storm as a function of its duration and time step."""
+    __slots__ = ()
+    COLUMNS = (
+        ("duration", "Duration (hours)"),
+        ("time_step", "Time step (hours)"),
+        ("peak", "Peak flow (m3/s)"),
+        ("time_to_peak", "Time to peak (hours)"),
+    )
+    duration = _column(0, "Storm duration (h).")
+    time_step = _column(1, "Hyetograph interval d (h).")
+    peak = _column(2, "Peak flow (m³/s).")
+    time_to_peak = _column(3, "Time of the peak from the start of the storm (h).")
+
+    @property
+    def maximum(self):
+        """(duration, time_step, peak) of the storm giving the maximum peak of the sweep."""
+        i = int(np.nanargmax(self._data[2]))
+        return float(self._data[0, i]), float(self._data[1, i]), float(self._data[2, i])
+
+    @property
+    def bracketed(self):
+        """
+        True when the maximum peak is higher than the peaks of both the shortest and the longest
+        swept duration of its time step (durations rounded to the same number of intervals give
+        the same storm, so the position of the maximum alone is not enough).
+        """
+        _, time_step, peak = self.maximum
+        durations, peaks = self._data[0, self._data[1] == time_step], self._data[2, self._data[1] == time_step]
+        edges = peaks[[np.argmin(durations), np.argmax(durations)]]
+        return bool(np.all(peak > edges * (1 + 1e-9)))
+
+    @property
+    def critical(self):
+        """
+        (duration, time_step, peak) of the critical storm. Raises ValueError when the maximum is
+        at the shortest or longest duration, since the critical duration then lies outside the sweep.
+        """
+        if not self.bracketed:
+            duration, time_step, _ = self.maximum
+            raise ValueError(f"The maximum peak is at the edge of the swept durations (D = {duration:.3f} h, "
+                             f"d = {time_step:.4f} h): extend the duration range.")
+        return self.maximum
@@ -0,0 +1,235 @@
+"""
+Append-only on-disk store for the results of the NRCS scripts (hyetographs, excess
+rainfall and hydrographs; see results.py).
+
+Layout of a store directory:
+    index.jsonl       One JSON line per stored result: scenario metadata (basin, Tr, CN,
+                      tc, d, ...), result type, shape and location of its data block.
+    chunk_00000.bin   Data blocks appended one after the other; a new chunk file is
+                      started when the current one reaches `chunk_bytes`.
+
+    store.lock        Lock file taken (exclusively) by every append.
+
+Every block is the (columns x samples) float64 array of one result, stored raw (so it
+can be memory-mapped without reading it) or zlib-compressed (read and decompressed on
+its own; compressed blocks cannot be memory-mapped). Blocks are written before their
+index line, so an interrupted append leaves at most unreferenced bytes at the end of a
+chunk.
+
+Several processes may append to and read from the same store: appends hold an exclusive
+lock on store.lock and reload the index lines written by others before assigning the
+next id, and query() picks up the lines appended since the last read.
+
+Example:
+    store = ResultsStore("results/")
+    store.append(precipitation, basin="cuencasur2", return_period=100, CN=79, tc=0.8, d=0.114)
+    entries = store.query(kind="Hydrograph", basin="cuencasur2")
+    hydrograph = store.read(entries[0])                       # memory-mapped
+    entries, peaks = store.slice("flow", kind="Hydrograph")   # (scenarios x samples)
+"""
+import json
+import os
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+from results import PrecipitationResult, UnitHydrograph, Hydrograph, PeakDurationCurve
+
+INDEX_NAME = "index.jsonl"
+LOCK_NAME = "store.lock"
+CHUNK_BYTES = 64 * 2 ** 20  # Maximum size of a chunk file
+RESULT_TYPES = {cls.__name__: cls for cls in (PrecipitationResult, UnitHydrograph, Hydrograph, PeakDurationCurve)}
+
+
+@contextmanager
+def _exclusive_lock(lock_file):
+    """Holds an exclusive lock on `lock_file` (fcntl on POSIX, msvcrt on Windows)."""
+    with open(lock_file, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ResultsStore:
+    """
+    Chunked, append-only store of result objects with a JSON-lines metadata index.
+    Raw blocks are memory-mapped by read()/slice(); compressed blocks are always read into memory.
+    """
+
+    def __init__(self, path, compress=False, chunk_bytes=CHUNK_BYTES):
+        """
+        :param path: Store directory (created if missing).
+        :param compress: Store new blocks zlib-compressed (they can then no longer be memory-mapped).
+        :param chunk_bytes: Size at which a new chunk file is started.
+        """
+        self.path = path
+        self.compress = compress
+        self.chunk_bytes = chunk_bytes
+        os.makedirs(path, exist_ok=True)
+        self.index = []
+        self._index_bytes = 0  # Size of the index file already loaded (complete lines only)
+        self.refresh()
+
+    def __len__(self):
+        return len(self.index)
+
+    def refresh(self):
+        """
+        Loads the index lines appended (by this or any other process) since the last call.
+        :return: Number of new entries.
+        """
+        index_file = os.path.join(self.path, INDEX_NAME)
+        if not os.path.exists(index_file) or os.path.getsize(index_file) <= self._index_bytes:
+            return 0
+        with open(index_file, "rb") as f:
+            f.seek(self._index_bytes)
+            tail = f.read()
+        # A line without its newline is still being written (or was interrupted): leave it for later
+        complete = tail[:tail.rfind(b"\n") + 1]
+        entries = [json.loads(line) for line in complete.decode("utf-8").splitlines() if line.strip()]
+        self.index.extend(entries)
+        self._index_bytes += len(complete)
+        return len(entries)
+
+    def _entry(self, entry):
+        """Index entry of an entry dict or id (reloading the index for ids appended by other processes)."""
+        if not isinstance(entry, int):
+            return entry
+        if entry >= len(self.index):
+            self.refresh()
+        return self.index[entry]
+
+    def _chunk_path(self, chunk):
+        return os.path.join(self.path, f"chunk_{chunk:05d}.bin")
+
+    def append(self, result, basin=None, return_period=None, CN=None, tc=None, d=None, **extra):
+        """
+        Appends one result.
+        :param result: PrecipitationResult, UnitHydrograph, Hydrograph or PeakDurationCurve.
+        :param basin, return_period, CN, tc, d: Scenario metadata used by query().
+        :param extra: Any other JSON-serializable metadata.
+        :return: The index entry of the stored result.
+        """
+        kind = type(result).__name__
+        if kind not in RESULT_TYPES:
+            raise TypeError(f"Unsupported result type: {kind}")
+        block = np.ascontiguousarray(result.data, dtype="<f8")
+        payload = zlib.compress(block.tobytes()) if self.compress else block.tobytes()
+        metadata = {"basin": basin, "return_period": return_period, "CN": CN, "tc": tc, "d": d, **extra}
+        metadata = {key: value.item() if isinstance(value, np.generic) else value for key, value in metadata.items()}
+
+        with _exclusive_lock(os.path.join(self.path, LOCK_NAME)):
+            self.refresh()
+            index_file = os.path.join(self.path, INDEX_NAME)
+            if os.path.exists(index_file) and os.path.getsize(index_file) > self._index_bytes:
+                # Partial line of an interrupted append (no writer can be active while we hold the lock)
+                with open(index_file, "r+b") as f:
+                    f.truncate(self._index_bytes)
+
+            chunk = self.index[-1]["chunk"] if self.index else 0
+            chunk_file = self._chunk_path(chunk)
+            if os.path.exists(chunk_file) and os.path.getsize(chunk_file) + len(payload) > self.chunk_bytes:
+                chunk += 1
+                chunk_file = self._chunk_path(chunk)
+            with open(chunk_file, "ab") as f:
+                offset = f.tell()
+                f.write(payload)
+
+            entry = {"id": len(self.index), "kind": kind, **metadata, "shape": list(block.shape), "chunk": chunk,
+                     "offset": offset, "nbytes": len(payload), "codec": "zlib" if self.compress else "raw"}
+            line = (json.dumps(entry) + "\n").encode("utf-8")
+            with open(index_file, "ab") as f:
+                f.write(line)
+            self.index.append(entry)
+            self._index_bytes += len(line)
+        return entry
+
+    def query(self, kind=None, **filters):
+        """
+        Index entries matching every filter.
+        :param kind: Result type name (e.g. "Hydrograph").
+        :param filters: metadata=value, metadata=[values] or metadata=(min, max) (inclusive range).
+        :return: List of entries in insertion order (including those appended by other processes).
+        """
+        self.refresh()
+        def matches(entry):
+            if kind is not None and entry["kind"] != kind:
+                return False
+            for key, condition in filters.items():
+                value = entry.get(key)
+                if isinstance(condition, tuple):
+                    if value is None or not condition[0] <= value <= condition[1]:
+                        return False
+                elif isinstance(condition, list):
+                    if value not in condition:
+                        return False
+                elif value != condition:
+                    return False
+            return True
+
+        return [entry for entry in self.index if matches(entry)]
+
+    def read_block(self, entry, mmap=True):
+        """
+        (columns x samples) array of one entry (or id); raw blocks are memory-mapped unless mmap=False,
+        compressed blocks are always decompressed into memory.
+        """
+        entry = self._entry(entry)
+        shape = tuple(entry["shape"])
+        chunk_file = self._chunk_path(entry["chunk"])
+        if entry["codec"] == "raw" and mmap:
+            return np.memmap(chunk_file, dtype="<f8", mode="r", offset=entry["offset"], shape=shape)
+        with open(chunk_file, "rb") as f:
+            f.seek(entry["offset"])
+            payload = f.read(entry["nbytes"])
+        if entry["codec"] == "zlib":
+            payload = zlib.decompress(payload)
+        return np.frombuffer(payload, dtype="<f8").reshape(shape)
+
+    def read(self, entry, mmap=True):
+        """
+        Result object of one entry (or id), backed by a memory map for raw blocks (see read_block).
+        """
+        entry = self._entry(entry)
+        return RESULT_TYPES[entry["kind"]].from_block(self.read_block(entry, mmap))
+
+    def slice(self, column, kind=None, start=None, stop=None, **filters):
+        """
+        One column of many scenarios; raw blocks are memory-mapped, so only that column range is read.
+        Every chunk file is mapped once (not once per entry), so the number of open files does not
+        grow with the number of scenarios.
+        :param column: Column attribute or label (e.g. "flow", "effective").
+        :param kind: Result type name.
+        :param start, stop: Sample range of every series.
+        :param filters: See query().
+        :return: (entries, array of shape (scenarios, samples)); shorter series are padded with NaN.
+        """
+        entries = self.query(kind, **filters)
+        lengths = [len(range(entry["shape"][1])[start:stop]) for entry in entries]
+        stacked = np.full((len(entries), max(lengths, default=0)), np.nan)
+        chunks = {}  # chunk -> byte map of the whole chunk file
+        for i, entry in enumerate(entries):
+            row = RESULT_TYPES[entry["kind"]].column_index(column)
+            if entry["codec"] == "raw":
+                if entry["chunk"] not in chunks:
+                    chunks[entry["chunk"]] = np.memmap(self._chunk_path(entry["chunk"]), dtype=np.uint8, mode="r")
+                # Byte view, since a chunk that also holds compressed blocks may leave raw blocks unaligned
+                payload = chunks[entry["chunk"]][entry["offset"]:entry["offset"] + entry["nbytes"]]
+                block = payload.view("<f8").reshape(entry["shape"])
+            else:
+                block = self.read_block(entry)
+            stacked[i, :lengths[i]] = block[row, start:stop]  # Copied now: no view outlives this step
+        return entries, stacked
@@ -1,7 +1,7 @@
 # %% Step 0: Loading
 import numpy as np
 import pandas as pd
-from NRCS import generate_precipitation_nrcs, convolve_hydrograph, generate_unit_hydrograph_nrcs
+from NRCS import generate_precipitation_nrcs, convolve_hydrograph, generate_unit_hydrograph
 from concentration_time import calculate_tc_kirpich
 from hyetogram_transform import transform_hyetogram
 import matplotlib.pyplot as plt
@@ -16,6 +16,8 @@ P_3_10 = 79  # Precipitación máxima en 3 horas con un periodo de retorno de 10
 Tr = 100  # Periodo de retorno en años
 NC = 60 # Número de curva
 I_min = 2.4  # Infiltración mínima del en mm/h 
+unit_hydrograph_method = "nrcs"  # Hidrograma unitario: "nrcs" (triangular) o "clark"
+R = None  # Coeficiente de almacenamiento de Clark en horas (solo para "clark")
 
 slope = (h_max - h_min) / 1000 / length_cauce  # Pendiente del cauce en m/m
 
@@ -44,7 +46,7 @@ for duration, precipitation, effective in zip(time_intervals, hyetogram, effecti
     print(f"{duration:<17.2f} | {precipitation:.2f} | {effective:.2f}")
 
 # %% Generar y plotear el hidrograma unitario
-time_steps, unit_hydrograph = generate_unit_hydrograph_nrcs(tc, basin_area)
+time_steps, unit_hydrograph = generate_unit_hydrograph(tc, basin_area, unit_hydrograph_method, R)
 
 plt.plot(time_steps, unit_hydrograph)
 plt.xlabel('Time (hours)')
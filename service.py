@@ -0,0 +1,382 @@
+"""
+Local JSON service for the NRCS design-hydrograph pipeline.
+
+A small asyncio HTTP/1.1 server (standard library only) that keeps NRCS.py and its
+dependencies imported in a pool of warm worker processes. Concurrent requests are
+coalesced: the requests arriving within `batch_window` seconds are grouped by basin and
+storm (every parameter except the curve number), and each group is computed as one
+vectorized batch (losses of all CN values at once, one FFT convolution). Responses are
+kept in an LRU cache, and identical requests already in flight share one computation.
+
+Endpoints (JSON bodies; parameter names as in NRCS.generate_precipitation_nrcs):
+    GET  /health
+    GET  /stats                  cache and batching counters
+    POST /tc                     {"length", "h_max", "h_min"[, "to"]} -> {"tc"} (Kirpich)
+    POST /unit-hydrograph        {"tc" | "length", "h_max", "h_min", "area"[, "uh", "storage"]}
+    POST /precipitation          basin + {"P3_10", "return_period", "NC", "I_min"[, "d", "duration"]}
+    POST /hydrograph             same as /precipitation[, "uh", "storage", "hyetograph": true]
+
+Usage:
+    python cli.py serve [--port 8765] [--workers 4]
+    python service_loadtest.py --requests 2000 --concurrency 32
+"""
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from concentration_time import calculate_tc_kirpich
+from NRCS import (design_hyetograph_nrcs, correct_precipitation_infiltration, generate_unit_hydrograph,
+                  convolve_hydrograph_batch)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+BATCH_WINDOW = 0.005  # Seconds a batch waits for more requests
+MAX_BATCH = 256
+CACHE_SIZE = 1024
+MAX_BODY = 1 << 20
+MAX_SAMPLES = 100_000  # Longest hyetograph or unit hydrograph routing a request may ask for
+
+STORM_KEYS = ("tc", "d", "duration", "P3_10", "return_period", "area", "I_min", "uh", "storage")
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+# ==========================
+# COMPUTATION (worker processes)
+# ==========================
+def basin_parameters(params):
+    """
+    Normalized parameters of a request: tc (given or Kirpich + "to"), d (defaults to tc / 7)
+    and every other value as float.
+    """
+    params = dict(params)
+    if params.get("tc") is None:
+        try:
+            slope = (float(params["h_max"]) - float(params["h_min"])) / 1000 / float(params["length"])
+        except KeyError:
+            raise ValueError("Either tc or length, h_max and h_min are required.")
+        params["tc"] = calculate_tc_kirpich(float(params["length"]), slope) + float(params.get("to", 0.0))
+    for key in ("length", "h_max", "h_min", "to"):
+        params.pop(key, None)
+    for key, value in params.items():
+        if key not in ("uh", "hyetograph") and value is not None:
+            params[key] = float(value)
+    params["d"] = params.get("d") or params["tc"] / 7
+    params.setdefault("duration", None)
+    params["uh"] = params.get("uh") or "nrcs"
+    params.setdefault("storage", None)
+    if params["uh"] not in ("nrcs", "clark"):
+        raise ValueError(f"Unknown unit hydrograph method: {params['uh']}")
+    if params["uh"] == "clark" and params["storage"] is None:
+        raise ValueError("The Clark unit hydrograph requires storage.")
+    check_ranges(params)
+    return params
+
+
+def check_ranges(params):
+    """
+    Rejects (ValueError) parameters outside their physical range or asking for more than
+    MAX_SAMPLES samples, so a single request cannot exhaust the memory of a worker.
+    """
+    for key, value in params.items():
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(f"{key} must be a finite number.")
+    for key in ("tc", "d", "area", "P3_10", "duration", "storage"):
+        if params.get(key) is not None and params[key] <= 0:
+            raise ValueError(f"{key} must be positive.")
+    if params.get("return_period") is not None and params["return_period"] <= 1:
+        raise ValueError("return_period must be greater than 1 year.")
+    if params.get("NC") is not None and not 0 < params["NC"] <= 100:
+        raise ValueError("NC must be in (0, 100].")
+    if params.get("I_min") is not None and params["I_min"] < 0:
+        raise ValueError("I_min must not be negative.")
+    duration = params.get("duration") or 12 * params["tc"] / 7
+    if duration / params["d"] > MAX_SAMPLES:
+        raise ValueError(f"duration / d exceeds {MAX_SAMPLES} intervals.")
+    if params.get("uh") == "clark":
+        # generate_unit_hydrograph_clark routes every min(tc / 7, R) over about tc + 14 R
+        step = min(params["tc"] / 7, params["storage"])
+        if (params["tc"] + 14 * params["storage"]) / step > MAX_SAMPLES:
+            raise ValueError(f"The Clark routing of tc and storage exceeds {MAX_SAMPLES} steps.")
+
+
+def unit_hydrograph(params):
+    """(time, ordinates) of the 100-point unit hydrograph of a request (NRCS or Clark)."""
+    return generate_unit_hydrograph(params["tc"], params["area"], params["uh"], params["storage"])
+
+
+def compute_storm_group(params_list):
+    """
+    Hyetographs and hydrographs of requests sharing every parameter except NC, in one batch.
+    :param params_list: Normalized parameters (see basin_parameters).
+    :return: List of response dicts.
+    """
+    p = params_list[0]
+    durations, precipitation = design_hyetograph_nrcs(p["tc"], p["P3_10"], p["return_period"], p["area"], p["d"],
+                                                      p["duration"])
+    curve_numbers = np.array([q["NC"] for q in params_list])
+    effective = correct_precipitation_infiltration(precipitation, curve_numbers, p["d"], p["I_min"])
+
+    # Same as convolve_hydrograph(unit_hydrograph, effective) in the scripts and cli.py nrcs:
+    # the hydrograph keeps the 100 samples of the unit hydrograph time axis
+    time, uh_flow = unit_hydrograph(p)
+    flows = convolve_hydrograph_batch(effective, uh_flow, length=len(time))
+
+    responses = []
+    for q, row_effective, flow in zip(params_list, effective, flows):
+        peak = int(np.argmax(flow))
+        response = {"tc": p["tc"], "d": p["d"], "NC": q["NC"], "time": time.tolist(), "flow": flow.tolist(),
+                    "peak": {"time": float(time[peak]), "flow": float(flow[peak])}}
+        if q.get("hyetograph"):
+            response["hyetograph"] = {"time": durations.tolist(), "precipitation": precipitation.tolist(),
+                                      "infiltration": (precipitation - row_effective).tolist(),
+                                      "effective": row_effective.tolist()}
+        responses.append(response)
+    return responses
+
+
+def compute_batch(requests):
+    """
+    Computes a batch of (endpoint, parameters) requests; requests of the same storm are vectorized.
+    :return: List of (status, response dict), in request order.
+    """
+    results = [None] * len(requests)
+    groups = {}
+    for i, (endpoint, params) in enumerate(requests):
+        try:
+            params = basin_parameters(params)
+            required = ("area",) if endpoint == "unit-hydrograph" else ("P3_10", "return_period", "area", "NC", "I_min")
+            for key in required:
+                if key not in params:
+                    raise ValueError(f"Missing parameter: {key}")
+            if endpoint == "unit-hydrograph":
+                time, flow = unit_hydrograph(params)
+                results[i] = (200, {"tc": params["tc"], "time": list(map(float, time)), "flow": list(map(float, flow))})
+                continue
+            if endpoint == "precipitation":
+                params["hyetograph"] = True
+            key = tuple(params[k] for k in STORM_KEYS)
+            groups.setdefault(key, []).append((i, endpoint, params))
+        except (ValueError, TypeError, ZeroDivisionError, OverflowError) as e:
+            results[i] = (400, {"error": str(e)})
+        except Exception as e:  # e.g. MemoryError: only this request fails
+            results[i] = (500, {"error": repr(e)})
+
+    # Every storm group is computed on its own, so a failing group does not fail the others
+    for members in groups.values():
+        try:
+            responses = compute_storm_group([params for _, _, params in members])
+        except (ValueError, TypeError, ZeroDivisionError, OverflowError) as e:
+            for i, _, _ in members:
+                results[i] = (400, {"error": str(e)})
+            continue
+        except Exception as e:
+            for i, _, _ in members:
+                results[i] = (500, {"error": repr(e)})
+            continue
+        for (i, endpoint, _), response in zip(members, responses):
+            if endpoint == "precipitation":
+                response = {"tc": response["tc"], "d": response["d"], **response["hyetograph"]}
+            results[i] = (200, response)
+    return results
+
+
+def _warm_worker():
+    # Import and run the pipeline once so the first real batch does not pay for it
+    compute_batch([("hydrograph", {"tc": 1.0, "area": 1.0, "P3_10": 80, "return_period": 10, "NC": 75, "I_min": 1})])
+
+
+# ==========================
+# SERVICE
+# ==========================
+class HydrographService:
+    """Request coalescing, LRU cache and process pool behind the HTTP handlers."""
+
+    def __init__(self, workers=None, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH, cache_size=CACHE_SIZE):
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.queue = None
+        self.workers = workers or os.cpu_count()
+        self.executor = self._new_executor()
+        self.counters = {"requests": 0, "cache_hits": 0, "coalesced": 0, "batches": 0, "batched_requests": 0,
+                         "largest_batch": 0, "pool_restarts": 0}
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        # Start (and warm) every worker before accepting requests
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, time.sleep, 0.01)
+                               for _ in range(self.workers)))
+        self._collector = asyncio.create_task(self._collect())
+
+    def _new_executor(self):
+        # Spawned, not forked: a pool replacing a broken one would otherwise be forked while the
+        # threads of the old pool hold their locks, and its workers could deadlock
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                   mp_context=multiprocessing.get_context("spawn"))
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    async def compute(self, endpoint, params):
+        """Response of one request, from the cache, a computation in flight or a new batch."""
+        self.counters["requests"] += 1
+        key = endpoint + json.dumps(params, sort_keys=True)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.counters["cache_hits"] += 1
+            return self.cache[key]
+        if key in self.in_flight:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        await self.queue.put((endpoint, params, future))
+        try:
+            result = await future
+        finally:
+            self.in_flight.pop(key, None)
+        if result[0] == 200:
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.counters["batches"] += 1
+            self.counters["batched_requests"] += len(batch)
+            self.counters["largest_batch"] = max(self.counters["largest_batch"], len(batch))
+            asyncio.create_task(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            results = await loop.run_in_executor(executor, compute_batch, [(e, p) for e, p, _ in batch])
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed by the OOM killer): the pool is unusable, start a new one
+            if self.executor is executor:
+                self.counters["pool_restarts"] += 1
+                self.executor = self._new_executor()
+                executor.shutdown(wait=False, cancel_futures=True)
+            results = [(500, {"error": repr(e)})] * len(batch)
+        except Exception as e:  # Unexpected failure of the batch
+            results = [(500, {"error": repr(e)})] * len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def handle(self, method, path, body):
+        """(status, response dict) of one HTTP request."""
+        endpoint = path.strip("/").split("?")[0]
+        if endpoint == "health":
+            return 200, {"status": "ok"}
+        if endpoint == "stats":
+            return 200, {**self.counters, "cache_entries": len(self.cache)}
+        if endpoint not in ("tc", "unit-hydrograph", "precipitation", "hydrograph"):
+            return 404, {"error": f"Unknown endpoint: {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST with a JSON body."}
+        try:
+            params = json.loads(body or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("The body must be a JSON object.")
+        except ValueError as e:
+            return 400, {"error": f"Invalid JSON: {e}"}
+
+        # Validate before the request joins a batch (the workers check again)
+        try:
+            normalized = basin_parameters(params)
+        except (ValueError, TypeError, ZeroDivisionError, OverflowError) as e:
+            return 400, {"error": str(e)}
+        if endpoint == "tc":
+            return 200, {"tc": normalized["tc"]}
+        return await self.compute(endpoint, params)
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {k.strip().lower(): v.strip() for k, _, v in (h.partition(":") for h in header_lines if h)}
+                keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+                try:
+                    method, path, _ = request_line.split(" ", 2)
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # The body cannot be delimited: answer and close the connection
+                    status, response, keep_alive = 400, {"error": "Malformed request line or Content-Length."}, False
+                else:
+                    if length > MAX_BODY:
+                        status, response = 413, {"error": "Request body too large."}
+                    else:
+                        body = await reader.readexactly(length) if length else b""
+                        status, response = await self.handle(method, path, body)
+
+                payload = json.dumps(response).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **options):
+    """
+    Runs the service until cancelled.
+    :param options: HydrographService options (workers, batch_window, max_batch, cache_size).
+    """
+    service = HydrographService(**options)
+    try:
+        # Stop cleanly on SIGTERM too, so the worker processes are shut down with the service
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError):  # Windows
+        pass
+    try:
+        await service.start()
+        server = await asyncio.start_server(service.serve_connection, host, port)
+        print(f"Serving NRCS hydrographs on http://{host}:{port}", file=sys.stderr, flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(host=DEFAULT_HOST, port=DEFAULT_PORT, **options):
+    try:
+        asyncio.run(serve(host, port, **options))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
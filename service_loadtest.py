@@ -0,0 +1,147 @@
+"""
+Load test of the local hydrograph service (service.py).
+
+Sends POST /hydrograph requests over `--concurrency` keep-alive connections and reports
+throughput and latency percentiles. Basins are drawn from a pool of `--distinct` parameter
+sets (small pools exercise the cache, large ones the batching); the pool holds a few storms
+with many curve numbers each, so concurrent requests of the same storm can be batched.
+
+Usage:
+    python service_loadtest.py [--requests 2000] [--concurrency 32] [--distinct 500] [--spawn]
+
+--spawn starts `python cli.py serve` on the given port for the duration of the test.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASIN = {"tc": 0.8, "area": 1.21, "P3_10": 83, "return_period": 100, "I_min": 1.2}
+
+
+def request_pool(distinct, seed=0):
+    """`distinct` request bodies: a few storms times many curve numbers."""
+    rng = np.random.default_rng(seed)
+    storms = max(1, distinct // 50)
+    per_storm = -(-distinct // storms)
+    tcs = rng.uniform(0.5, 3.0, storms).round(3)
+    return [dict(BASIN, tc=float(tcs[i % storms]), NC=round(40 + 59 * (i // storms) / per_storm, 3))
+            for i in range(distinct)]
+
+
+async def post(reader, writer, host, path, body):
+    payload = json.dumps(body).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = int(next(line.split(b":", 1)[1] for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")))
+    return status, await reader.readexactly(length)
+
+
+async def get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+async def run_load(host, port, requests, concurrency, distinct):
+    """
+    Runs the load test.
+    :return: dict with throughput (req/s), latency percentiles (ms), errors and the service counters.
+    """
+    pool = request_pool(distinct)
+    rng = np.random.default_rng(1)
+    bodies = [pool[i] for i in rng.integers(0, len(pool), requests)]
+    latencies = []
+    errors = 0
+    next_request = 0
+
+    async def client():
+        nonlocal errors, next_request
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while next_request < len(bodies):
+                body = bodies[next_request]
+                next_request += 1
+                start = time.perf_counter()
+                status, _ = await post(reader, writer, host, "/hydrograph", body)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_ms": {f"p{q}": float(np.percentile(latencies_ms, q)) for q in (50, 90, 95, 99)} | {
+            "max": float(latencies_ms.max())},
+        "service": await get_json(host, port, "/stats"),
+    }
+
+
+async def wait_until_ready(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await get_json(host, port, "/health")
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--distinct", type=int, default=500, help="Distinct request bodies.")
+    parser.add_argument("--spawn", action="store_true", help="Start the service for the test.")
+    parser.add_argument("--workers", type=int, default=None, help="Workers of the spawned service.")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.spawn:
+        command = [sys.executable, os.path.join(ROOT_DIR, "cli.py"), "serve", "--host", args.host, "--port", str(args.port)]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        process = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_until_ready(args.host, args.port))
+        report = asyncio.run(run_load(args.host, args.port, args.requests, args.concurrency, args.distinct))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    latency = report["latency_ms"]
+    print(f"{report['requests']} requests ({report['errors']} errors) in {report['elapsed_s']:.2f} s: "
+          f"{report['throughput_rps']:.0f} req/s")
+    print("Latency (ms): " + ", ".join(f"{k} {v:.1f}" for k, v in latency.items()))
+    service = report["service"]
+    print(f"Service: {service['cache_hits']} cache hits, {service['coalesced']} coalesced, "
+          f"{service['batches']} batches (largest {service['largest_batch']})")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The root modules and the HMS_2_hydrogram modules import their siblings by bare name
+for path in (ROOT, os.path.join(ROOT, "HMS_2_hydrogram")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,26 @@
+import json
+
+from benchmark import SYNTHETIC_CASES, compare_results, run_benchmarks
+
+
+def result(median_s, target_s=None):
+    return {"median_s": median_s, "target_s": target_s}
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"a@1": result(1.0), "b@1": result(1.0), "c@1": result(1.0), "gone@1": result(1.0),
+                            "cli@1": result(0.1, 0.15)}}
+    current = {"results": {"a@1": result(1.05), "b@1": result(1.5), "c@1": result(0.5), "new@1": result(1.0),
+                           "cli@1": result(0.2, 0.15)}}
+    statuses = {key: status for key, *_, status in compare_results(baseline, current, threshold=0.10)}
+    assert statuses == {"a@1": "ok", "b@1": "REGRESSION", "c@1": "improved", "gone@1": "missing",
+                        "new@1": "new", "cli@1": "OVER TARGET"}
+
+
+def test_every_synthetic_case_runs():
+    report = run_benchmarks(sizes=[100], repeat=1, include_fixtures=False, include_cold_start=False)
+    assert set(report["results"]) == {f"{name}@100" for name in SYNTHETIC_CASES}
+    assert all(entry["median_s"] >= 0 for entry in report["results"].values())
+    json.dumps(report)
+    rows = compare_results(report, report)
+    assert {status for *_, status in rows} == {"ok"}
@@ -0,0 +1,44 @@
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+from calibration import calibrate_basin, fit_metrics, load_reference_hydrograph, simulate_hydrographs
+from NRCS import convolve_hydrograph, generate_precipitation_nrcs, generate_unit_hydrograph_nrcs
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "HMS_2_hydrogram", "_test")
+MODEL = dict(area=1.21, P3_10=83, return_period=25, I_min=1.2, d=5 / 60)
+
+
+def test_simulation_matches_the_scripts():
+    time_steps, unit_hydrograph = generate_unit_hydrograph_nrcs(0.8, 1.21)
+    simulated = simulate_hydrographs([60, 75, 90], 0.8, time_steps, **MODEL)
+    for row, NC in zip(simulated, [60, 75, 90]):
+        precipitation = generate_precipitation_nrcs(0.8, 83, 25, 1.21, NC, 1.2, 5 / 60)
+        expected = convolve_hydrograph(unit_hydrograph, precipitation.effective)
+        np.testing.assert_allclose(row, expected, rtol=0, atol=1e-10 * np.abs(expected).max())
+
+
+def test_reference_times_are_unwrapped():
+    times, flows = load_reference_hydrograph(os.path.join(FIXTURES, "cuencasur2_tr25_hydrogram.csv"))
+    assert len(times) == len(flows)
+    assert np.all(np.diff(times) > 0)
+
+
+def test_metrics_of_a_flat_reference():
+    times = np.linspace(0, 5, 20)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        metrics = fit_metrics(np.ones((2, 20)), np.zeros(20), times)
+    assert np.isnan(metrics["nse"]).all() and np.isnan(metrics["peak_error"]).all()
+    assert np.isnan(metrics["volume_error"]).all()
+
+
+def test_recovers_a_synthetic_basin():
+    times = np.linspace(0, 2.5, 60)
+    observed = simulate_hydrographs([72.0], 0.9, times, **MODEL)[0]
+    result = calibrate_basin(times, observed, tc=0.9, grid_size=15, **MODEL)
+    assert result["nse"] > 0.99
+    assert result["CN"] == pytest.approx(72.0, abs=0.5)
+    assert result["tc"] == pytest.approx(0.9, rel=0.01)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from NRCS import generate_unit_hydrograph, sample_unit_hydrograph_clark, time_area_fraction
+
+
+def clark_loop(tc, storage, area, dt, steps):
+    """Linear reservoir routed one step at a time, as in HEC-HMS."""
+    c = dt / (storage + 0.5 * dt)
+    edges = np.arange(int(np.ceil(tc / dt)) + 1) * dt
+    inflow = 0.2778 * area * np.diff(time_area_fraction(edges / tc)) / dt
+    outflow, previous, ordinates = 0.0, 0.0, []
+    for i in range(steps):
+        outflow = c * (inflow[i] if i < len(inflow) else 0.0) + (1 - c) * previous
+        ordinates.append((outflow + previous) / 2)
+        previous = outflow
+    return np.array(ordinates)
+
+
+@pytest.mark.parametrize("tc, storage, dt", [(0.8, 0.5, 0.8 / 7), (2.0, 0.3, 0.25), (1.5, 4.0, 0.2), (1.0, 0.1, 0.2)])
+def test_matches_the_reservoir_recursion(tc, storage, dt):
+    time, ordinates = sample_unit_hydrograph_clark(tc, storage, 1.21, dt, tolerance=1e-14)  # No truncation
+    expected = clark_loop(tc, storage, 1.21, dt, len(ordinates))
+    np.testing.assert_allclose(ordinates, expected, rtol=0, atol=1e-12 * expected.max())
+    np.testing.assert_allclose(time, (np.arange(len(ordinates)) + 1) * dt)
+
+
+def test_batched_basins_match_one_at_a_time():
+    tc, storage, area = np.array([0.8, 1.5, 3.0]), np.array([0.5, 1.0, 2.0]), np.array([1.21, 4.0, 10.0])
+    _, ordinates = sample_unit_hydrograph_clark(tc, storage, area, 0.1, tolerance=1e-14)
+    for i in range(3):
+        _, single = sample_unit_hydrograph_clark(tc[i], storage[i], area[i], 0.1, tolerance=1e-14)
+        np.testing.assert_allclose(ordinates[i, :len(single)], single, atol=1e-12 * single.max())
+
+
+@pytest.mark.parametrize("storage", [0.2, 1.0, 5.0])
+def test_unit_volume(storage):
+    # 1 mm over 1.21 km² (0.2778 is the rounded 1 / 3.6 of the scripts)
+    _, ordinates = sample_unit_hydrograph_clark(0.8, storage, 1.21, 0.1)
+    assert ordinates.sum() * 0.1 * 3600 == pytest.approx(1210 * 0.2778 * 3.6, rel=1e-5)
+    time, flow = generate_unit_hydrograph(0.8, 1.21, "clark", storage)
+    assert len(time) == 100 and time[0] == 0 and flow[0] == 0
+    assert np.trapezoid(flow, time) * 3600 == pytest.approx(1210, rel=2e-2)
+
+
+def test_rejects_oscillating_time_steps():
+    with pytest.raises(ValueError):
+        sample_unit_hydrograph_clark(0.8, 0.1, 1.21, 0.25)
+    with pytest.raises(ValueError):
+        generate_unit_hydrograph(0.8, 1.21, "clark")
@@ -0,0 +1,65 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from results_store import ResultsStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NRCS_ARGS = ["nrcs", "--tc", "0.8", "--area", "1.21", "--p3-10", "83", "--tr", "100", "--cn", "79", "--i-min", "1.2"]
+
+
+def run_cli(*args, code=None):
+    command = [sys.executable, "-c", code] if code else [sys.executable, os.path.join(ROOT, "cli.py")]
+    return subprocess.run(command + list(args), check=True, capture_output=True, text=True, cwd=ROOT)
+
+
+def read_table(text):
+    rows = list(csv.reader(text.splitlines()))
+    return rows[0], np.array(rows[1:], dtype=float)
+
+
+def test_nrcs_matches_the_baseline_scripts():
+    header, table = read_table(run_cli(*NRCS_ARGS).stdout)
+    assert header == ["Time (hours)", "Flow (m3/s)"]
+    assert table.shape == (100, 2)
+    # Values of script.py before the command-line entry point
+    assert table[:, 0].max() == pytest.approx(1.4341714285714284, rel=1e-12)
+    assert int(np.argmax(table[:, 1])) == 44
+    assert table[:, 1].max() == pytest.approx(16.495961375801652, rel=1e-12)
+    assert table[:, 1].sum() == pytest.approx(837.4817070966972, rel=1e-12)
+
+
+def test_compare_fails_without_pairs(tmp_path):
+    (tmp_path / "hms").mkdir()
+    (tmp_path / "nrcs").mkdir()
+    (tmp_path / "hms" / "basin.csv").write_text("Time (hours),Flow (m3/s)\n0,0\n")
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "cli.py"), "compare", str(tmp_path / "hms"),
+                             str(tmp_path / "nrcs")], capture_output=True, text=True, cwd=ROOT)
+    assert result.returncode != 0
+    assert "counterpart" in result.stderr and result.stdout == ""
+
+
+def test_nrcs_only_imports_numpy():
+    code = ("import sys, cli; cli.main(sys.argv[1:] + ['-o', '" + os.devnull.replace("\\", "\\\\") + "']); "
+            "loaded = {'pandas', 'matplotlib', 'hecdss', 'scipy'} & set(sys.modules); "
+            "assert not loaded, loaded")
+    run_cli(*NRCS_ARGS, code=code)
+
+
+def test_trace_and_store(tmp_path):
+    trace, store = tmp_path / "trace.json", tmp_path / "store"
+    hyetograph = tmp_path / "hyetograph.csv"
+    run_cli("--trace", str(trace), *NRCS_ARGS, "--hyetograph", str(hyetograph), "--store", str(store),
+            "--basin", "sur2", "-o", str(tmp_path / "hydrograph.csv"))
+    names = {span["name"] for span in json.loads(trace.read_text())["spans"]}
+    assert {"compute.nrcs.precipitation", "compute.nrcs.unit_hydrograph", "compute.nrcs.convolution"} <= names
+
+    entries = ResultsStore(str(store)).query(basin="sur2")
+    assert [entry["kind"] for entry in entries] == ["PrecipitationResult", "Hydrograph"]
+    _, hyetograph_table = read_table(hyetograph.read_text())
+    np.testing.assert_array_equal(ResultsStore(str(store)).read(entries[0]).data.T, hyetograph_table)
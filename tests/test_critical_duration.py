@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from NRCS import convolve_hydrograph, convolve_hydrograph_batch, generate_precipitation_nrcs, generate_unit_hydrograph
+from critical_duration import critical_duration_sweep, uniform_hyetographs
+
+BASIN = dict(tc=0.8, P3_10=83, return_period=100, area=1.21, NC=79, I_min=1.2)
+
+
+def test_batch_convolution_matches_np_convolve():
+    rng = np.random.default_rng(0)
+    precipitation = rng.normal(1.0, 2.0, (5, 37))  # Includes negative effective precipitation
+    unit_hydrograph = rng.random(23)
+    flows = convolve_hydrograph_batch(precipitation, unit_hydrograph)
+    expected = np.array([np.convolve(p, unit_hydrograph) for p in precipitation])
+    np.testing.assert_allclose(flows, expected, rtol=0, atol=1e-12 * np.abs(expected).max())
+    assert np.any(flows < 0)
+    np.testing.assert_array_equal(convolve_hydrograph_batch(precipitation, unit_hydrograph, length=40), flows[:, :40])
+
+
+def test_batch_convolution_keeps_exact_zeros():
+    flows = convolve_hydrograph_batch([[0.0, 0.0, 3.0, 0.0]], [1.0, 2.0, 1.0])
+    np.testing.assert_array_equal(flows, [np.convolve([0.0, 0.0, 3.0, 0.0], [1.0, 2.0, 1.0])])
+
+
+@pytest.mark.parametrize("uh, storage", [("nrcs", None), ("clark", 0.5)])
+@pytest.mark.parametrize("duration", [0.8, 0.8 / 7 * 12, 3.0])
+def test_sweep_matches_the_nrcs_command(duration, uh, storage):
+    # Same pipeline as cli.py nrcs --duration
+    d = BASIN["tc"] / 7
+    curve = critical_duration_sweep(**BASIN, durations=[duration], method=uh, storage=storage)
+    precipitation = generate_precipitation_nrcs(BASIN["tc"], BASIN["P3_10"], BASIN["return_period"], BASIN["area"],
+                                                BASIN["NC"], BASIN["I_min"], d, duration)
+    time_steps, unit_hydrograph = generate_unit_hydrograph(BASIN["tc"], BASIN["area"], uh, storage)
+    flow = convolve_hydrograph(unit_hydrograph, precipitation.effective)
+    assert curve.peak[0] == pytest.approx(flow.max(), rel=1e-10)
+    assert curve.time_to_peak[0] == pytest.approx(time_steps[np.argmax(flow)])
+
+
+def test_nrcs_peak_of_the_default_storm():
+    curve = critical_duration_sweep(**BASIN, durations=[0.8 / 7 * 12])  # D of cli.py nrcs
+    assert curve.peak[0] == pytest.approx(16.495961375801652, rel=1e-12)  # Qmax of cli.py nrcs
+    with pytest.raises(ValueError):
+        curve.critical  # One duration: nothing to bracket
+
+
+def test_maximum_at_the_edge_of_the_sweep_is_not_critical():
+    # Alternating storms keep growing with the duration
+    curve = critical_duration_sweep(**BASIN)
+    assert not curve.bracketed
+    assert curve.maximum[2] == pytest.approx(curve.peak.max())
+    with pytest.raises(ValueError):
+        curve.critical
+
+
+def test_uniform_storm_has_a_critical_duration():
+    curve = critical_duration_sweep(**BASIN, durations=np.linspace(0.1, 48, 200), storm="uniform")
+    duration, _, peak = curve.critical
+    assert 0.1 < duration < 48
+    assert peak > curve.peak[0] and peak > curve.peak[-1]
+
+
+def test_uniform_hyetographs_keep_the_storm_depth():
+    cumulative = np.array([10.0, 16.0, 19.0, 21.0])
+    hyetographs = uniform_hyetographs(cumulative, [1, 2, 4])
+    np.testing.assert_allclose(hyetographs.sum(axis=1), [10.0, 16.0, 21.0])
+    np.testing.assert_allclose(hyetographs[1], [8.0, 8.0, 0.0, 0.0])
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from detention_pond import ORIFICE_CD, G, pond_rating_tables, route_ponds, sizing_sweep
+
+
+def puls_loop(inflow, dt, stage, storage, outflow):
+    """Modified Puls routing of one inflow through one pond, one step at a time."""
+    si_table = 2 * storage / (dt * 3600) + outflow
+    si, q = si_table[0], outflow[0]
+    routed, peak_si = [q], si
+    for t in range(1, len(inflow)):
+        si = si + inflow[t - 1] + inflow[t] - 2 * q
+        i = min(max(np.searchsorted(si_table, si, side="right") - 1, 0), len(si_table) - 2)
+        slope = (outflow[i + 1] - outflow[i]) / (si_table[i + 1] - si_table[i])
+        q = max(outflow[i] + slope * (si - si_table[i]), 0.0)
+        routed.append(q)
+        peak_si = max(peak_si, si)
+    return np.array(routed), np.interp(peak_si, si_table, stage)
+
+
+@pytest.fixture(scope="module")
+def inflows():
+    t = np.arange(0, 12, 0.05)
+    return np.array([8 * np.exp(-((t - 2) / 0.7) ** 2), 3 * np.exp(-((t - 3) / 1.2) ** 2), 25 * (t < 1.5)])
+
+
+def test_matches_the_scalar_loop(inflows):
+    stage, storage, outflow = pond_rating_tables([3000, 8000, 20000], [3, 4, 2.5], orifice_diameter=[0.3, 0.5, 0.4],
+                                                 weir_length=[5, 0, 10])
+    routed = route_ponds(inflows, 0.05, stage, storage, outflow, keep_outflow=True)
+    for p in range(3):
+        for i in range(len(inflows)):
+            if routed["overtopped"][p, i]:
+                continue
+            expected, peak_stage = puls_loop(inflows[i], 0.05, stage[p], storage[p], outflow[p])
+            np.testing.assert_allclose(routed["outflow"][p, i], expected, rtol=0, atol=1e-10)
+            assert routed["peak_outflow"][p, i] == pytest.approx(expected.max(), abs=1e-10)
+            assert routed["peak_stage"][p, i] == pytest.approx(peak_stage, abs=1e-10)
+    assert routed["overtopped"][0, 2]
+
+
+def test_overtopped_peaks_are_not_extrapolated(inflows):
+    rows = sizing_sweep(inflows, 0.05, bottom_area=2000, depth=2, orifice_diameter=0.2)
+    overtopped = [row for row in rows if row["overtopped"]]
+    assert overtopped
+    for row in overtopped:
+        for key in ("peak_outflow", "attenuation", "peak_stage", "peak_storage"):
+            assert np.isnan(row[key])
+        assert row["peak_inflow"] > 0
+    for row in rows:
+        if not row["overtopped"]:
+            assert 0 < row["peak_stage"] <= 2
+
+    stage, storage, outflow = pond_rating_tables(2000, 2, orifice_diameter=0.2)
+    routed = route_ponds(inflows, 0.05, stage, storage, outflow, keep_outflow=True)
+    assert np.all(np.isnan(routed["outflow"][routed["overtopped"]]))
+
+
+def test_orifice_rating_is_continuous_at_the_crown():
+    diameter = 0.4
+    stage, _, outflow = pond_rating_tables(5000, 2.0, orifice_diameter=diameter, points=2001)
+    assert np.all(np.diff(outflow) > 0)
+    crown = ORIFICE_CD * np.pi * diameter ** 2 / 4 * np.sqrt(G * diameter)
+    below, above = stage < diameter, stage >= diameter
+    assert outflow[below][-1] == pytest.approx(crown, rel=1e-2)
+    assert outflow[above][0] == pytest.approx(crown, rel=1e-2)
+    # Flow below the centre of the opening (where the orifice head is zero)
+    assert outflow[(stage > 0) & (stage < diameter / 2)].min() > 0
+    np.testing.assert_allclose(outflow[above], ORIFICE_CD * np.pi * diameter ** 2 / 4
+                               * np.sqrt(2 * G * (stage[above] - diameter / 2)), rtol=1e-12)
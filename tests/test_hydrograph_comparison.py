@@ -0,0 +1,74 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from hydrograph_comparison import compare_directories, compare_hydrographs, load_hydrograph
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "HMS_2_hydrogram", "_test")
+
+
+def test_identical_series_on_different_axes():
+    times = np.linspace(0, 6, 181)
+    flows = np.interp(times, [0, 1, 3, 6], [0, 10, 2, 0])
+    coarse = times[::3], flows[::3]  # Same piecewise-linear hydrograph, coarser steps
+    metrics, = compare_hydrographs((times, flows), coarse)
+    assert metrics["nse"] == pytest.approx(1.0, abs=1e-12)
+    assert metrics["kge"] == pytest.approx(1.0, abs=1e-12)
+    assert metrics["peak_diff"] == pytest.approx(0.0, abs=1e-12)
+    assert metrics["volume_diff"] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_matches_a_direct_computation():
+    reference = load_hydrograph(os.path.join(FIXTURES, "cuencasur2_tr25_hydrogram.csv"))
+    simulated = (reference[0], 1.1 * reference[1])
+    metrics, = compare_hydrographs(reference, simulated)
+    observed = reference[1]
+    assert metrics["peak_diff"] == pytest.approx(0.1 * observed.max(), rel=1e-12)
+    assert metrics["rmse"] == pytest.approx(np.sqrt(np.mean((0.1 * observed) ** 2)), rel=1e-9)
+    assert metrics["r"] == pytest.approx(1.0, abs=1e-12)
+    assert metrics["volume_error"] == pytest.approx(0.1, rel=1e-9)
+
+
+def test_directories_in_parallel_match_one_process(tmp_path, caplog):
+    reference, simulated = tmp_path / "hms", tmp_path / "nrcs"
+    reference.mkdir()
+    simulated.mkdir()
+    for basin in ("cuencanorte", "cuencasur1", "cuencasur2"):
+        shutil.copy(os.path.join(FIXTURES, f"{basin}_tr25_hydrogram.csv"), reference / f"{basin}.csv")
+        shutil.copy(os.path.join(FIXTURES, f"{basin}_tr100_hydrogram.csv"), simulated / f"{basin}.csv")
+    shutil.copy(os.path.join(FIXTURES, "cuencaoeste_tr25_hydrogram.csv"), reference / "unpaired.csv")
+
+    with caplog.at_level("WARNING", logger="hydrograph"):
+        sequential = compare_directories(str(reference), str(simulated), workers=1)
+    unmatched = [r.fields["file"] for r in caplog.records if r.event == "compare.unmatched"]
+    assert unmatched == [str(reference / "unpaired.csv")]
+    parallel = compare_directories(str(reference), str(simulated), workers=2)
+    assert [row["name"] for row in sequential] == ["cuencanorte", "cuencasur1", "cuencasur2"]
+    assert parallel == sequential
+    assert all(row["peak_diff"] > 0 for row in sequential)  # Tr 100 against Tr 25
+
+
+def test_directories_must_pair_up(tmp_path):
+    reference, simulated = tmp_path / "hms", tmp_path / "nrcs"
+    reference.mkdir()
+    simulated.mkdir()
+    file = os.path.join(FIXTURES, "cuencasur2_tr25_hydrogram.csv")
+    shutil.copy(file, reference / "cuencasur2.csv")
+    shutil.copy(file, simulated / "cuencasur1.csv")
+    with pytest.raises(ValueError, match="counterpart"):
+        compare_directories(str(reference), str(simulated))
+    with pytest.raises(ValueError, match="both be"):
+        compare_directories(str(reference), file)
+    with pytest.raises(ValueError, match="both be"):
+        compare_directories(file, str(simulated))
+
+
+def test_dss_sources_need_a_pathname(tmp_path):
+    (tmp_path / "basin.dss").write_bytes(b"")
+    file = os.path.join(FIXTURES, "cuencasur2_tr25_hydrogram.csv")
+    with pytest.raises(ValueError, match="pathname"):
+        compare_directories(str(tmp_path / "basin.dss"), file)
+    with pytest.raises(ValueError, match="pathname"):
+        compare_directories(file, file, readers=("auto", "dss"))
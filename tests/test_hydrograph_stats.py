@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+from data_reader_csv import load_csv_data, unwrap_day_hours
+from hydrograph_stats import StreamingStatistics, compute_statistics, stack_series
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "HMS_2_hydrogram", "_test")
+
+
+def reference_statistics(time, flow, threshold):
+    """Series-by-series computation with plain loops."""
+    volume = moment = above = 0.0
+    for i in range(1, len(time)):
+        dt = time[i] - time[i - 1]
+        q = (flow[i] + flow[i - 1]) / 2
+        volume += q * dt
+        moment += q * (time[i] + time[i - 1]) / 2 * dt
+        above += dt if q > threshold else 0.0
+    peak = int(np.argmax(flow))
+    runoff = np.flatnonzero(flow > 0)
+    return {"peak_flow": flow[peak], "time_to_peak": time[peak], "volume_m3": volume * 3600,
+            "time_above_threshold": above, "centroid_time": moment / volume,
+            "rising_duration": time[peak] - time[runoff[0]], "falling_duration": time[runoff[-1]] - time[peak]}
+
+
+@pytest.fixture(scope="module")
+def series():
+    frames = [load_csv_data(os.path.join(FIXTURES, f"cuenca{name}_tr100_hydrogram.csv"))
+              for name in ("norte", "oeste", "sur1", "sur2")]
+    return [df["Time_h"].to_numpy() for df in frames], [df["Q_outflow"].to_numpy() for df in frames]
+
+
+def test_loaded_times_increase_across_midnight(series):
+    for time in series[0]:
+        assert np.all(np.diff(time) > 0)
+    np.testing.assert_array_equal(unwrap_day_hours([22.0, 23.0, 0.0, 1.0, 0.5]), [22, 23, 24, 25, 48.5])
+
+
+def test_single_pass_matches_the_loop_reference(series):
+    times, flows = series
+    table = compute_statistics(times, flows, threshold=1.0)
+    for row, time, flow in zip(table.itertuples(), times, flows):
+        expected = reference_statistics(time, flow, 1.0)
+        for name, value in expected.items():
+            assert getattr(row, name) == pytest.approx(value, rel=1e-12), name
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 100])
+def test_chunked_updates_match_one_pass(series, chunk):
+    times, flows = stack_series(*series)
+    expected = StreamingStatistics(len(flows), threshold=1.0).update(times, flows).to_frame()
+    stats = StreamingStatistics(len(flows), threshold=1.0)
+    for start in range(0, times.shape[1], chunk):
+        stats.update(times[:, start:start + chunk], flows[:, start:start + chunk])
+    np.testing.assert_allclose(stats.to_frame().drop(columns="label").to_numpy(dtype=float),
+                               expected.drop(columns="label").to_numpy(dtype=float), rtol=1e-12, equal_nan=True)
+
+
+def test_one_series(series):
+    times, flows = series
+    single = compute_statistics(times[0], flows[0])
+    np.testing.assert_allclose(single.drop(columns="label").to_numpy(dtype=float),
+                               compute_statistics(times[:1], flows[:1]).drop(columns="label").to_numpy(dtype=float))
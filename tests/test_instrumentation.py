@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture
+def tracing():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_spans_record_nothing():
+    instrumentation.reset()
+    with instrumentation.span("stage") as s:
+        s.rows = 10
+    assert instrumentation.records() == []
+    assert instrumentation.instrumented("double")(lambda x: 2 * x)(4) == 8
+
+
+def test_nested_spans(tracing):
+    @tracing.instrumented("parse")
+    def parse(n):
+        return list(range(n))
+
+    with tracing.span("report", figure="a"):
+        parse(5)
+        parse(7)
+    stages = tracing.summary()["stages"]
+    assert stages["report;parse"]["calls"] == 2
+    assert stages["report;parse"]["rows"] == 12
+    assert stages["report"]["self_wall_s"] == pytest.approx(
+        stages["report"]["wall_s"] - stages["report;parse"]["wall_s"])
+    assert stages["report"]["peak_bytes"] is not None
+
+
+def test_memory_is_only_tracked_in_the_main_thread(tracing):
+    def work():
+        with tracing.span("worker"):
+            bytearray(1 << 20)
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+    record, = tracing.records()
+    assert record["path"] == "worker" and record["peak_bytes"] is None
+
+
+def test_span_attributes_may_use_any_name(tracing, caplog):
+    attrs = {"name": "n", "rows": 3, "logger": 1, "level": 2, "event": 3, "message": 4, "fields": 5}
+    with caplog.at_level("DEBUG", logger=tracing.LOGGER_NAME):
+        with tracing.span("stage", **attrs) as s:
+            s.rows = 7
+    record, = tracing.records()
+    assert record["name"] == "stage" and record["rows"] == 7 and record["attrs"] == attrs
+    event, = [r for r in caplog.records if r.event == "span.end"]
+    assert event.fields == {**attrs, "rows": 7}
+
+
+def test_collapsed_stacks(tracing, tmp_path):
+    with tracing.span("a"):
+        with tracing.span("b"):
+            pass
+    tracing.write_collapsed(str(tmp_path / "stacks.txt"))
+    lines = (tmp_path / "stacks.txt").read_text().splitlines()
+    assert [line.rsplit(" ", 1)[0] for line in lines] == ["a;b", "a"]
+    assert all(int(line.rsplit(" ", 1)[1]) >= 0 for line in lines)
+
+
+def test_import_leaves_logging_alone():
+    code = ("import logging, instrumentation; "
+            "assert not logging.getLogger(instrumentation.LOGGER_NAME).handlers; "
+            "assert not logging.getLogger().handlers")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(instrumentation.__file__))
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
@@ -0,0 +1,37 @@
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from data_reader_csv import load_csv_data
+from pipeline import build_report
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "HMS_2_hydrogram", "_test")
+INPUTS = sorted(glob.glob(os.path.join(FIXTURES, "*_hydrogram.csv")))
+
+
+@pytest.mark.parametrize("wrap", [True, False])
+@pytest.mark.parametrize("processes", [False, True])
+def test_pipelined_report_matches_the_sequential_one(tmp_path, wrap, processes):
+    sequential = build_report(INPUTS, load_csv_data, str(tmp_path / "sequential.tex"), time_max=20, wrap=wrap)
+    pipelined = build_report(INPUTS, load_csv_data, str(tmp_path / "pipelined.tex"), time_max=20, wrap=wrap,
+                             workers=3, processes=processes)
+    assert (tmp_path / "pipelined.tex").read_bytes() == (tmp_path / "sequential.tex").read_bytes()
+    assert not (tmp_path / "pipelined.tex.part").exists()
+    assert pipelined["labels"] == sequential["labels"]
+    pd.testing.assert_frame_equal(pipelined["statistics"], sequential["statistics"])
+
+
+def test_pipelined_mode_parses_in_processes_by_default(tmp_path, monkeypatch):
+    import pipeline
+    pools = []
+
+    class RecordingPool(pipeline.ThreadPoolExecutor):
+        def __init__(self, max_workers=None):
+            pools.append(max_workers)
+            super().__init__(max_workers)
+
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", RecordingPool)
+    build_report(INPUTS, load_csv_data, str(tmp_path / "figure.tex"), time_max=20, workers=2)
+    assert pools == [2]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rainfall_frequency import AnnualMaxima, design_rainfall, read_record_chunks
+
+DT = 1.0  # h
+
+
+@pytest.fixture(scope="module")
+def record():
+    rng = np.random.default_rng(1)
+    index = pd.date_range("2001-01-01", "2004-12-31 23:00", freq="h")
+    depths = np.where(rng.random(len(index)) < 0.05, rng.gamma(0.8, 4.0, len(index)), 0.0)
+    depths[rng.random(len(index)) < 0.01] = np.nan  # Missing intervals
+    return pd.Series(depths, index=index)
+
+
+def rolling_maxima(record, durations):
+    """Annual maxima of pandas rolling sums (the window is assigned to the year of its last interval)."""
+    filled = record.fillna(0.0)
+    columns = [filled.rolling(max(int(round(duration / DT)), 1)).sum().groupby(filled.index.year).max()
+               for duration in durations]
+    return pd.concat(columns, axis=1).to_numpy()
+
+
+@pytest.mark.parametrize("chunk", [24, 1000, 10 ** 6])
+def test_chunked_maxima_match_rolling_sums(record, chunk):
+    durations = [1, 3, 6, 24, 72]
+    maxima = AnnualMaxima(durations, DT)
+    years = record.index.year.to_numpy()
+    for start in range(0, len(record), chunk):
+        maxima.update(record.to_numpy()[start:start + chunk], years[start:start + chunk])
+    result_years, table = maxima.result()
+    np.testing.assert_array_equal(result_years, [2001, 2002, 2003, 2004])
+    np.testing.assert_allclose(table, rolling_maxima(record, durations), rtol=1e-12)
+
+
+def test_years_with_missing_data_are_dropped(record):
+    depths = record.to_numpy().copy()
+    depths[record.index.year == 2002] = np.nan
+    years, _ = AnnualMaxima([1], DT).update(depths, record.index.year.to_numpy()).result()
+    np.testing.assert_array_equal(years, [2001, 2003, 2004])
+
+
+def test_read_and_fit_do_not_depend_on_the_chunk_size(record, tmp_path):
+    path = tmp_path / "record.csv"
+    rows = record.dropna()
+    # A repeated row and a gap at the start must not change the detected interval
+    rows = pd.concat([rows.iloc[:1], rows.iloc[:1], rows.iloc[3:]])
+    rows.rename_axis("time").rename("depth").to_csv(path)
+
+    dt, chunks = read_record_chunks(str(path))
+    assert dt == DT
+    first, _ = next(chunks)
+    assert np.isnan(first[1:3]).all()
+
+    small = design_rainfall(str(path), durations=[1, 24], chunk_rows=500)
+    large = design_rainfall(str(path), durations=[1, 24])
+    np.testing.assert_allclose(small["depths"], large["depths"], rtol=1e-12)
+    assert small["P3_10"] == pytest.approx(large["P3_10"], rel=1e-12)
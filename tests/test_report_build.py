@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from data_reader_csv import load_csv_data
+from pipeline import build_report
+from report_build import MANIFEST_NAME, build_figures
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "HMS_2_hydrogram", "_test")
+
+
+@pytest.fixture
+def project(tmp_path):
+    for name in ("cuencasur2_tr25_hydrogram.csv", "cuencasur2_tr100_hydrogram.csv", "cuencanorte_tr25_hydrogram.csv"):
+        shutil.copy(os.path.join(FIXTURES, name), tmp_path / name)
+    figures = [{"output": "sur2.tex", "inputs": ["cuencasur2_tr25_hydrogram.csv", "cuencasur2_tr100_hydrogram.csv"],
+                "time_min": 0.5, "time_max": 3.5, "num_points": 500},
+               {"output": "norte.tex", "inputs": ["cuencanorte_tr25_hydrogram.csv"]}]
+    (tmp_path / "figures.json").write_text(json.dumps(figures))
+    return tmp_path
+
+
+def statuses(results):
+    return [status for _, status in results]
+
+
+def test_only_stale_figures_are_rebuilt(project):
+    figures = str(project / "figures.json")
+    assert statuses(build_figures(figures)) == ["rebuilt", "rebuilt"]
+    assert (project / MANIFEST_NAME).exists()
+    assert statuses(build_figures(figures)) == ["up-to-date", "up-to-date"]
+
+    with open(project / "cuencanorte_tr25_hydrogram.csv", "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert statuses(build_figures(figures)) == ["up-to-date", "rebuilt"]
+
+    os.remove(project / "sur2.tex")
+    assert statuses(build_figures(figures)) == ["rebuilt", "up-to-date"]
+    assert statuses(build_figures(figures, force=True)) == ["rebuilt", "rebuilt"]
+
+    os.remove(project / "cuencasur2_tr100_hydrogram.csv")
+    assert statuses(build_figures(figures)) == ["missing-input", "up-to-date"]
+
+
+def test_parameters_are_part_of_the_key(project):
+    figures = json.loads((project / "figures.json").read_text())
+    build_figures(figures, base_dir=str(project))
+    figures[0]["num_points"] = 100
+    assert statuses(build_figures(figures, base_dir=str(project))) == ["rebuilt", "up-to-date"]
+
+
+def test_output_matches_build_report(project, tmp_path_factory):
+    build_figures(str(project / "figures.json"), workers=2)
+    expected = tmp_path_factory.mktemp("direct") / "sur2.tex"
+    build_report([str(project / "cuencasur2_tr25_hydrogram.csv"), str(project / "cuencasur2_tr100_hydrogram.csv")],
+                 load_csv_data, str(expected), time_min=0.5, time_max=3.5, num_points=500)
+    assert (project / "sur2.tex").read_bytes() == expected.read_bytes()
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from NRCS import convolve_hydrograph, generate_precipitation_nrcs, generate_unit_hydrograph_nrcs
+from results import Hydrograph, PrecipitationResult
+
+
+def test_matches_the_dataframe_pipeline_of_the_baseline():
+    # Values of the DataFrame-returning generators before the result objects
+    result = generate_precipitation_nrcs(0.8, 83, 100, 1.21, 79, 1.2, 0.8 / 7)
+    np.testing.assert_allclose(result.data.sum(axis=1), [8.914285714285715, 84.49979762232995,
+                                                         48.110724288167994, 36.38907333416197], rtol=1e-12)
+    time_steps, unit_hydrograph = generate_unit_hydrograph_nrcs(0.8, 1.21)
+    assert time_steps[-1] == pytest.approx(1.4341714285714284, rel=1e-12)
+    assert unit_hydrograph.max() == pytest.approx(0.4675592907801418, rel=1e-12)
+    flow = convolve_hydrograph(unit_hydrograph, result.effective)
+    assert int(np.argmax(flow)) == 44
+    assert flow.max() == pytest.approx(16.495961375801652, rel=1e-12)
+    assert flow.sum() == pytest.approx(837.4817070966972, rel=1e-12)
+
+
+def test_precipitation_columns_match_the_table_of_the_scripts():
+    result = generate_precipitation_nrcs(0.8, 83, 100, 1.21, 79, 1.2, 0.8 / 7)
+    table = result.to_pandas()
+    assert list(table.columns) == PrecipitationResult.labels()
+    np.testing.assert_array_equal(result.effective, table["Effective Precipitation (mm)"])
+    np.testing.assert_array_equal(result[3], result.effective)
+    np.testing.assert_array_equal(result[-1], result.effective)
+    np.testing.assert_array_equal(result[np.int64(0)], result.time)
+
+
+def test_unpacking_and_views():
+    time, flow = generate_unit_hydrograph_nrcs(0.8, 1.21)
+    assert len(time) == len(flow) == 100
+    result = Hydrograph(time, flow)
+    assert np.shares_memory(result.flow, result.data)
+    assert result.peak == (float(time[np.argmax(flow)]), float(flow.max()))
+
+
+@pytest.mark.parametrize("key", [2, -3, True])
+def test_invalid_column_index(key):
+    result = Hydrograph([0.0, 1.0], [0.0, 2.0])
+    with pytest.raises((IndexError, KeyError)):
+        result[key]
+
+
+def test_array_conversion_copy_semantics():
+    result = Hydrograph([0.0, 1.0], [0.0, 2.0])
+    assert np.asarray(result) is result.data
+    copied = np.array(result, copy=True)
+    assert not np.shares_memory(copied, result.data)
+    np.testing.assert_array_equal(np.asarray(result, dtype=np.float32), result.data)
+    with pytest.raises(ValueError):
+        np.array(result, dtype=np.float32, copy=False)
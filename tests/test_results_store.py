@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from NRCS import generate_precipitation_nrcs, generate_unit_hydrograph_nrcs
+from results import Hydrograph
+from results_store import INDEX_NAME, ResultsStore
+
+
+def hydrograph(scale, samples=50):
+    time = np.linspace(0, 5, samples)
+    return Hydrograph(time, scale * np.sin(time) ** 2)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip(tmp_path, compress):
+    store = ResultsStore(str(tmp_path), compress=compress, chunk_bytes=4096)
+    precipitation = generate_precipitation_nrcs(0.8, 83, 100, 1.21, 79, 1.2, 0.8 / 7)
+    store.append(precipitation, basin="sur2", return_period=100, CN=79, tc=0.8, d=0.8 / 7)
+    store.append(generate_unit_hydrograph_nrcs(0.8, 1.21), basin="sur2", tc=0.8)
+    for i in range(20):
+        store.append(hydrograph(i), basin="norte" if i % 2 else "sur2", return_period=np.int64(25), CN=70 + i)
+
+    reopened = ResultsStore(str(tmp_path))
+    assert len(reopened) == 22
+    assert len({entry["chunk"] for entry in reopened.index}) > 1
+    np.testing.assert_array_equal(reopened.read(0).data, precipitation.data)
+    for entry in reopened.query(kind="Hydrograph", CN=(70, 89)):
+        np.testing.assert_array_equal(reopened.read(entry).data, hydrograph(entry["CN"] - 70).data)
+
+    entries, flows = reopened.slice("flow", kind="Hydrograph", basin="norte", start=10, stop=20)
+    assert [entry["CN"] for entry in entries] == list(range(71, 90, 2))
+    np.testing.assert_array_equal(flows, [hydrograph(entry["CN"] - 70).flow[10:20] for entry in entries])
+
+
+def test_interrupted_append(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append(hydrograph(1.0))
+    with open(os.path.join(str(tmp_path), INDEX_NAME), "ab") as f:
+        f.write(b'{"id": 1, "kind": "Hydr')  # Index line cut by a crash
+
+    other = ResultsStore(str(tmp_path))
+    assert len(other) == 1
+    entry = other.append(hydrograph(2.0))
+    assert entry["id"] == 1
+    assert [e["id"] for e in ResultsStore(str(tmp_path)).index] == [0, 1]
+    np.testing.assert_array_equal(store.read(1).data, hydrograph(2.0).data)
+
+
+def _append_many(path, worker, count):
+    store = ResultsStore(path, chunk_bytes=8192)
+    for i in range(count):
+        store.append(hydrograph(worker * 1000 + i, samples=20), worker=worker, i=i)
+
+
+def test_concurrent_appends(tmp_path):
+    workers, count = 4, 25
+    processes = [multiprocessing.get_context("spawn").Process(target=_append_many, args=(str(tmp_path), w, count))
+                 for w in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    store = ResultsStore(str(tmp_path))
+    assert [entry["id"] for entry in store.index] == list(range(workers * count))
+    for entry in store.index:
+        np.testing.assert_array_equal(store.read(entry).data,
+                                      hydrograph(entry["worker"] * 1000 + entry["i"], samples=20).data)
+
+
+def test_slice_many_entries_under_a_small_file_limit(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    for i in range(300):
+        store.append(hydrograph(i, samples=10), CN=i)
+    code = ("import resource, sys; resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64)); "
+            "sys.path[:0] = sys.argv[2:]; from results_store import ResultsStore; "
+            "entries, flows = ResultsStore(sys.argv[1]).slice('flow', kind='Hydrograph'); "
+            "assert flows.shape == (300, 10), flows.shape; print(flows[:, 5].sum())")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code, str(tmp_path), root], check=True, capture_output=True,
+                            text=True).stdout
+    assert float(output) == pytest.approx(sum(hydrograph(i, samples=10).flow[5] for i in range(300)))
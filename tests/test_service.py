@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import signal
+
+import numpy as np
+import pytest
+
+import service
+from NRCS import convolve_hydrograph, generate_precipitation_nrcs, generate_unit_hydrograph
+from service import HydrographService, compute_batch
+
+BASIN = {"tc": 0.8, "area": 1.21, "P3_10": 83, "return_period": 100, "I_min": 1.2}
+
+
+def script_hydrograph(NC, uh="nrcs", storage=None):
+    """Hydrograph computed like script.py / cli.py nrcs."""
+    precipitation = generate_precipitation_nrcs(0.8, 83, 100, 1.21, NC, 1.2, 0.8 / 7)
+    time, unit_hydrograph = generate_unit_hydrograph(0.8, 1.21, uh, storage)
+    flow = convolve_hydrograph(unit_hydrograph, precipitation.effective)
+    return time[:len(flow)], flow
+
+
+@pytest.mark.parametrize("uh, storage", [("nrcs", None), ("clark", 0.5)])
+def test_batch_matches_the_scripts(uh, storage):
+    curve_numbers = [60, 79, 95]
+    results = compute_batch([("hydrograph", {**BASIN, "NC": NC, "uh": uh, "storage": storage})
+                             for NC in curve_numbers])
+    for NC, (status, response) in zip(curve_numbers, results):
+        assert status == 200
+        time, flow = script_hydrograph(NC, uh, storage)
+        np.testing.assert_allclose(response["time"], time, rtol=1e-12)
+        np.testing.assert_allclose(response["flow"], flow, rtol=0, atol=1e-10 * flow.max())
+
+
+@pytest.mark.parametrize("changes", [{"NC": 150}, {"return_period": 1}, {"d": 1e-9}, {"duration": -1},
+                                     {"tc": float("nan")}, {"uh": "clark", "storage": 1e-7}, {"NC": "high"}])
+def test_invalid_parameters(changes):
+    (status, response), = compute_batch([("hydrograph", {**BASIN, "NC": 79, **changes})])
+    assert status == 400 and "error" in response
+
+
+def test_failing_group_does_not_fail_the_others(monkeypatch):
+    compute_storm_group = service.compute_storm_group
+
+    def failing(params_list):
+        if params_list[0]["P3_10"] == 90:
+            raise MemoryError()
+        return compute_storm_group(params_list)
+
+    monkeypatch.setattr(service, "compute_storm_group", failing)
+    results = compute_batch([("hydrograph", {**BASIN, "NC": 79}), ("hydrograph", {**BASIN, "P3_10": 90, "NC": 79}),
+                             ("hydrograph", {**BASIN, "NC": 60}), ("hydrograph", {**BASIN, "NC": -1})])
+    assert [status for status, _ in results] == [200, 500, 200, 400]
+
+
+async def request(port, data):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def post(path, params):
+    body = json.dumps(params).encode()
+    return (f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+
+def test_http_errors_and_pool_recovery():
+    async def scenario():
+        hydrographs = HydrographService(workers=1, batch_window=0.001)
+        await hydrographs.start()
+        server = await asyncio.start_server(hydrographs.serve_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            assert (await request(port, b"GARBAGE\r\n\r\n"))[0] == 400
+            assert (await request(port, b"POST /tc HTTP/1.1\r\nContent-Length: abc\r\n\r\n"))[0] == 400
+            assert (await request(port, b"POST /tc HTTP/1.1\r\nContent-Length: -1\r\n\r\n"))[0] == 400
+            assert (await request(port, post("/hydrograph", {**BASIN, "NC": 79, "d": 1e-6})))[0] == 400
+
+            status, response = await request(port, post("/hydrograph", {**BASIN, "NC": 79}))
+            assert status == 200
+            np.testing.assert_allclose(response["flow"], script_hydrograph(79)[1], atol=1e-10)
+
+            # Kill the worker: the batch fails, the pool is replaced and the next request succeeds
+            for process in list(hydrographs.executor._processes.values()):
+                os.kill(process.pid, signal.SIGKILL)
+            await asyncio.sleep(0.5)
+            assert (await request(port, post("/hydrograph", {**BASIN, "NC": 70})))[0] == 500
+            assert (await request(port, post("/hydrograph", {**BASIN, "NC": 71})))[0] == 200
+            assert hydrographs.counters["pool_restarts"] == 1
+        finally:
+            server.close()
+            hydrographs.close()
+
+    asyncio.run(scenario())